@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Incremental Statistics for Word Memorizer
+增量统计 - 按全部/难度/标签分组维护累加和, 另有按间隔的保持率
+
+每次单词变化时减去旧值、加上新值, 代价与单词的标签数成正比; 读取统计只与分组 (桶) 的数量有关。
+批量加载时在列式状态上一次性向量化计算。
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from logic.tag_index import unique_tags
+
+# 每个分组的累加和: 单词数, 已复习数, 复习次数, 答对次数, 难度和, 已复习单词的间隔和, 已复习单词的 EF 和
+COUNT, REVIEWED, REVIEWS, CORRECT, DIFFICULTY, INTERVAL, EF = range(7)
+
+
+def _empty() -> List:
+    return [0, 0, 0, 0, 0, 0, 0.0]
+
+
+def format_group(sums: List) -> Dict:
+    """与 DeckColumns.item_stats 的输出相同"""
+    count, reviewed, reviews, correct, difficulty, interval, ef = sums
+    if count == 0:
+        return {'reviewed': 0, 'accuracy': 0.0, 'avg_difficulty': 0.0, 'avg_interval': 0.0, 'avg_ef': 0.0}
+    return {
+        'reviewed': reviewed,
+        'unreviewed': count - reviewed,
+        'accuracy': round(correct / reviews * 100 if reviews > 0 else 0, 2),
+        'avg_difficulty': round(difficulty / count, 2),
+        'avg_interval': round(interval / reviewed if reviewed else 0, 2),
+        'avg_ef': round(ef / reviewed if reviewed else 0, 2)
+    }
+
+
+class StatsAggregator:
+    """取值元组的顺序与 logic.columnar.COLUMNS 相同。
+    标签分组可以稍后再建 (延迟加载模式下标签不在调度索引里): 建立之前 tags_loaded 为 False, 标签部分不更新"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total = _empty()
+        self.by_difficulty: Dict[int, List] = {}
+        self.by_tag: Dict[str, List] = {}
+        # interval -> [答对次数, 复习次数], 只统计复习过的单词
+        self.retention: Dict[int, List[int]] = {}
+        self.word_tags: Dict[str, Tuple[str, ...]] = {}
+        self.tags_loaded = False
+
+    # ---- 批量加载 ----
+
+    @staticmethod
+    def _sums(columns, rows: Optional[np.ndarray] = None) -> List:
+        select = (lambda name: columns[name]) if rows is None else (lambda name: columns[name][rows])
+        reviews = select('review_count')
+        reviewed = reviews > 0
+        return [int(len(reviews)), int(reviewed.sum()), int(reviews.sum()), int(select('correct_count').sum()),
+                int(select('difficulty').sum()), int(select('interval')[reviewed].sum()),
+                float(select('easiness_factor')[reviewed].sum())]
+
+    def load(self, columns, word_tags: Optional[Iterable[Tuple[str, Iterable[str]]]] = None):
+        """从列式状态重建全部分组; word_tags 为 (word_id, 标签) 序列, 为 None 时标签分组留到 load_tags"""
+        self.reset()
+        self.total = self._sums(columns)
+        difficulty = columns['difficulty']
+        for level in np.unique(difficulty):
+            self.by_difficulty[int(level)] = self._sums(columns, np.flatnonzero(difficulty == level))
+
+        reviewed = columns['review_count'] > 0
+        intervals, inverse = np.unique(columns['interval'][reviewed], return_inverse=True)
+        correct = np.bincount(inverse, weights=columns['correct_count'][reviewed], minlength=len(intervals))
+        total = np.bincount(inverse, weights=columns['review_count'][reviewed], minlength=len(intervals))
+        self.retention = {int(interval): [int(c), int(t)] for interval, c, t in zip(intervals, correct, total)}
+
+        if word_tags is not None:
+            self.load_tags(columns, word_tags)
+
+    def load_tags(self, columns, word_tags: Iterable[Tuple[str, Iterable[str]]]):
+        groups = defaultdict(list)
+        self.word_tags = {}
+        for word_id, tags in word_tags:
+            tags = unique_tags(tags)
+            if tags and word_id in columns.row_of:
+                self.word_tags[word_id] = tags
+                for tag in tags:
+                    groups[tag].append(word_id)
+        self.by_tag = {tag: self._sums(columns, columns.rows(word_ids)) for tag, word_ids in groups.items()}
+        self.tags_loaded = True
+
+    # ---- 增量更新 ----
+
+    @staticmethod
+    def _apply(sums: List, values: Tuple, sign: int):
+        _, interval, ef, _, reviews, correct, _, difficulty = values
+        sums[COUNT] += sign
+        sums[REVIEWS] += sign * reviews
+        sums[CORRECT] += sign * correct
+        sums[DIFFICULTY] += sign * difficulty
+        if reviews > 0:
+            sums[REVIEWED] += sign
+            sums[INTERVAL] += sign * interval
+            sums[EF] += sign * ef
+
+    @staticmethod
+    def _group(groups: Dict, key, values: Tuple, sign: int):
+        sums = groups.get(key)
+        if sums is None:
+            sums = groups[key] = _empty()
+        StatsAggregator._apply(sums, values, sign)
+        if sums[COUNT] == 0:
+            del groups[key]
+
+    def _contribute(self, values: Tuple, tags: Tuple[str, ...], sign: int):
+        self._apply(self.total, values, sign)
+        self._group(self.by_difficulty, int(values[7]), values, sign)
+        if self.tags_loaded:
+            for tag in tags:
+                self._group(self.by_tag, tag, values, sign)
+        if values[4] > 0:
+            rates = self.retention.setdefault(int(values[1]), [0, 0])
+            rates[0] += sign * values[5]
+            rates[1] += sign * values[4]
+            if rates[1] == 0 and rates[0] == 0:
+                del self.retention[int(values[1])]
+
+    def update(self, word_id: str, old_values: Optional[Tuple], new_values: Optional[Tuple],
+               tags: Iterable[str] = ()):
+        """单词从 old_values 变为 new_values (新增时 old 为 None, 删除时 new 为 None); tags 为新的标签"""
+        old_tags = self.word_tags.get(word_id, ())
+        if old_values is not None:
+            self._contribute(old_values, old_tags, -1)
+        if new_values is None:
+            self.word_tags.pop(word_id, None)
+            return
+        tags = unique_tags(tags)
+        if tags:
+            self.word_tags[word_id] = tags
+        else:
+            self.word_tags.pop(word_id, None)
+        self._contribute(new_values, tags, 1)
+
+    # ---- 读取 ----
+
+    def statistics(self) -> Dict:
+        """{'words', 'difficulty', 'tags', 'retention'}; 'tags' 只在 tags_loaded 时有意义"""
+        words = format_group(self.total)
+        words['total'] = self.total[COUNT]
+        words['unreviewed'] = self.total[COUNT] - self.total[REVIEWED]
+
+        def groups(grouped: Dict) -> Dict:
+            return {key: {**format_group(sums), 'count': sums[COUNT]} for key, sums in grouped.items()}
+        return {
+            'words': words,
+            'difficulty': groups(dict(sorted(self.by_difficulty.items()))),
+            'tags': groups(self.by_tag),
+            'retention': {interval: round(correct / reviews * 100, 2)
+                          for interval, (correct, reviews) in sorted(self.retention.items()) if reviews > 0},
+        }
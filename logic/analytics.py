@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Forgetting Curve Analytics for Word Memorizer
+遗忘曲线分析 - 从复习事件日志统计 "距上次复习的天数 -> 回忆率", 按全部/难度/标签分组, 并拟合指数遗忘曲线
+
+    1. 事件按单词分组: 单词序号是小整数, 用稳定的 16 位 argsort (基数排序), 超过 65536 个单词时分两趟;
+       组内相邻两次复习的时间差即后一次复习时距上次复习的天数, 同一会话内的重学 (不到半天) 不计入
+    2. 时间差按 EDGES 分箱, 用 np.bincount 一次得到每个 (单词, 区间) 的复习数、答对数和天数之和
+    3. 各分组的曲线由其中单词所在的行相加得到, 代价与分组的单词数成正比, 不再访问事件
+    4. 每条曲线在分箱数据上用极大似然拟合 R = exp(-decay * t), 半衰期为 ln2 / decay
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from logic.optimizer import DAY, DECAY_GRID, MIN_GAP_DAYS
+
+# 距上次复习天数的分箱边界, 最后一个区间不设上限
+EDGES = np.array([MIN_GAP_DAYS, 1, 2, 3, 5, 7, 10, 14, 21, 30, 45, 60, 90, 120, 180, 270, 365, np.inf])
+BINS = len(EDGES) - 1
+# 少于这么多次复习的曲线不拟合
+MIN_FIT_REVIEWS = 10
+# 分箱边界都是半天的整数倍: 按 "半天数" 查表得到区间, 不到 MIN_GAP_DAYS 的为 BINS (不计入)
+_BIN_OF_HALF_DAY = np.searchsorted(EDGES, np.arange(2 * 365 + 1) / 2, side='right') - 1
+_BIN_OF_HALF_DAY[_BIN_OF_HALF_DAY < 0] = BINS
+
+
+def group_order(word_index: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+    """按单词分组、组内按时间排列的下标。日志按时间追加时只需对单词序号做稳定排序;
+    导入过历史答题 (时间戳不单调) 时退回 lexsort"""
+    if len(timestamps) > 1 and not (timestamps[1:] >= timestamps[:-1]).all():
+        return np.lexsort((timestamps, word_index))
+    if not len(word_index) or word_index.max() <= 0xFFFF:
+        return np.argsort(word_index.astype(np.uint16), kind='stable')
+    # 低 16 位、高 16 位各一趟稳定排序 (LSD 基数排序)
+    order = np.argsort((word_index & 0xFFFF).astype(np.uint16), kind='stable')
+    return order[np.argsort((word_index[order] >> 16).astype(np.uint16), kind='stable')]
+
+
+def bin_reviews(timestamps: np.ndarray, word_index: np.ndarray, correct: np.ndarray,
+                words: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(复习数, 答对数, 天数之和), 形状都是 (words, BINS); 每个单词的第一次复习没有时间差, 不计入"""
+    # 结构化数组的字段是跨步视图, 先复制成连续数组, 之后的随机取数和计数快得多
+    timestamps, word_index, correct = (np.ascontiguousarray(values) for values in (timestamps, word_index, correct))
+    order = group_order(word_index, timestamps)
+    counts = np.bincount(word_index, minlength=words)
+    elapsed = np.diff(timestamps[order])
+    elapsed /= DAY
+    # 相邻两个位置之间的时间差落在哪个区间; 不到 MIN_GAP_DAYS 的和跨单词的放进多出来的第 BINS 个区间
+    half_days = (elapsed * 2).astype(np.int64)
+    np.clip(half_days, 0, len(_BIN_OF_HALF_DAY) - 1, out=half_days)
+    bins = _BIN_OF_HALF_DAY[half_days]
+    starts = np.cumsum(counts)[:-1]
+    bins[starts[(starts > 0) & (starts < len(timestamps))] - 1] = BINS
+    # 排序后的事件按单词连续排列, 每个位置的行号直接由每个单词的事件数展开
+    key = np.repeat(np.arange(words, dtype=np.int64) * (BINS + 1), counts)[1:]
+    key += bins
+    size = words * (BINS + 1)
+    reviews = np.bincount(key, minlength=size)
+    recalled = np.bincount(key, weights=correct[order[1:]], minlength=size)
+    days = np.bincount(key, weights=elapsed, minlength=size)
+    return tuple(values.reshape(words, BINS + 1)[:, :BINS] for values in (reviews, recalled, days))
+
+
+def fit_decay(reviews: np.ndarray, recalled: np.ndarray, days: np.ndarray) -> float:
+    """分箱数据上 R = exp(-decay * t) 的极大似然 decay (t 取区间内的平均天数); 数据不足时为 NaN"""
+    used = reviews > 0
+    n, k = reviews[used], recalled[used]
+    if n.sum() < MIN_FIT_REVIEWS or k.sum() in (0, n.sum()):
+        return np.nan
+    t = days[used] / n
+    exponent = -np.outer(DECAY_GRID, t)
+    loglik = (exponent * k).sum(axis=1) + (np.log(-np.expm1(exponent)) * (n - k)).sum(axis=1)
+    return float(DECAY_GRID[np.argmax(loglik)])
+
+
+def curve(reviews: np.ndarray, recalled: np.ndarray, days: np.ndarray) -> Dict:
+    """一条遗忘曲线: 只列出有复习的区间; 回忆率为百分比, 与 get_statistics 的 retention 相同"""
+    used = np.flatnonzero(reviews)
+    n = reviews[used]
+    decay = fit_decay(reviews, recalled, days)
+    return {
+        'elapsed_days': np.round(days[used] / n, 2).tolist(),
+        'retention': np.round(recalled[used] / n * 100, 2).tolist(),
+        'reviews': n.tolist(),
+        'total_reviews': int(n.sum()),
+        'decay': None if np.isnan(decay) else round(decay, 5),
+        'half_life_days': None if np.isnan(decay) else round(float(np.log(2) / decay), 1)
+    }
+
+
+def forgetting_curves(events: np.ndarray, words: int, difficulty: Optional[np.ndarray] = None,
+                      tags: Optional[Dict[str, Iterable[int]]] = None) -> Dict:
+    """events 为 EventLog.array() 的结构化数组, words 为单词表的长度;
+    difficulty 为按单词序号排列的难度 (0 为未知), tags 为 标签 -> 单词序号。
+    返回 {'bins', 'overall', 'difficulty', 'tags', 'events', 'pairs'}"""
+    reviews, recalled, days = bin_reviews(events['timestamp'], events['word_index'], events['correct'], words)
+    result = {
+        'bins': [[float(start), None if np.isinf(end) else float(end)] for start, end in zip(EDGES[:-1], EDGES[1:])],
+        'overall': curve(reviews.sum(axis=0), recalled.sum(axis=0), days.sum(axis=0)),
+        'difficulty': {},
+        'tags': {},
+        'events': len(events),
+        'pairs': int(reviews.sum())
+    }
+    if difficulty is not None:
+        for level in np.unique(difficulty[difficulty > 0]):
+            rows = np.flatnonzero(difficulty == level)
+            result['difficulty'][int(level)] = curve(reviews[rows].sum(axis=0), recalled[rows].sum(axis=0),
+                                                     days[rows].sum(axis=0))
+    for tag, rows in (tags or {}).items():
+        rows = np.fromiter(rows, dtype=np.int64)
+        result['tags'][tag] = curve(reviews[rows].sum(axis=0), recalled[rows].sum(axis=0), days[rows].sum(axis=0))
+    return result
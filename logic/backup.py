@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Backup Manager for Word Memorizer
+备份管理 - 按时间/修改数策略备份, 完整备份 + 相对完整备份的增量, gzip 流式读写, 支持按时间点恢复
+
+备份文件 (backups/ 目录):
+    full_<时间>.jsonl.gz    | 第一行为头 {"kind": "full", "created": ...}, 之后每行一条记录
+    delta_<时间>.jsonl.gz   | 头中 "base" 为所基于的完整备份; 记录为该完整备份之后修改过的全部单词 (累积)
+    changed.ids             | 最近一次完整备份之后写入过的 word_id, 每行一个; 重启后据此继续做增量
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIME_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+class BackupManager:
+    """interval 秒或 every_changes 条修改后备份一次; 增量累积到 max_deltas 个或超过词库
+    delta_ratio 比例时改做完整备份"""
+
+    def __init__(self, backup_dir: Path, backup_count: int = 5, interval: float = 1800,
+                 every_changes: int = 200, max_deltas: int = 10, delta_ratio: float = 0.5):
+        self.backup_dir = Path(backup_dir)
+        self.backup_dir.mkdir(exist_ok=True, parents=True)
+        self.backup_count = backup_count
+        self.interval = interval
+        self.every_changes = every_changes
+        self.max_deltas = max_deltas
+        self.delta_ratio = delta_ratio
+        self.changed_file = self.backup_dir / "changed.ids"
+        # 最近一次完整备份, 以及之后修改过的 word_id
+        self.base: Optional[Path] = None
+        self.changed_since_full: Set[str] = set()
+        self.changes_since_backup = 0
+        self.deltas_since_full = 0
+        backups = self.list_backups()
+        self.last_backup_time = backups[-1][0].timestamp() if backups else 0.0
+        fulls = [(created, path) for created, kind, path in backups if kind == "full"]
+        # 没有 changed.ids 时无法知道完整备份之后改过哪些单词, 下一次只能做完整备份
+        if fulls and self.changed_file.exists():
+            base_created, self.base = fulls[-1]
+            self.deltas_since_full = sum(1 for created, kind, _ in backups
+                                         if kind == "delta" and created > base_created)
+            with open(self.changed_file, 'r', encoding='utf-8') as f:
+                self.changed_since_full = {line.strip() for line in f if line.strip()}
+
+    def list_backups(self) -> List[Tuple[datetime, str, Path]]:
+        """按时间排序的 (创建时间, "full"/"delta", 路径)"""
+        backups = []
+        for path in self.backup_dir.glob("*.jsonl.gz"):
+            kind, _, stamp = path.name[:-len(".jsonl.gz")].partition('_')
+            if kind not in ("full", "delta"):
+                continue
+            try:
+                backups.append((datetime.strptime(stamp, TIME_FORMAT), kind, path))
+            except ValueError:
+                continue
+        return sorted(backups)
+
+    def note_saved(self, word_ids: Iterable[str]):
+        """登记写入存储后端的单词"""
+        word_ids = list(word_ids)
+        if not word_ids:
+            return
+        self.changed_since_full.update(word_ids)
+        self.changes_since_backup += len(word_ids)
+        try:
+            with open(self.changed_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{word_id}\n" for word_id in word_ids))
+        except OSError as e:
+            logger.warning(f"记录修改的单词失败: {e}")
+
+    def due(self, now: Optional[float] = None) -> bool:
+        if not self.last_backup_time:
+            # 还没有任何备份
+            return True
+        if not self.changes_since_backup:
+            return False
+        now = datetime.now().timestamp() if now is None else now
+        return (now - self.last_backup_time >= self.interval
+                or self.changes_since_backup >= self.every_changes)
+
+    def needs_full(self, deck_size: int) -> bool:
+        return (self.base is None or not self.base.exists()
+                or self.deltas_since_full >= self.max_deltas
+                or len(self.changed_since_full) > deck_size * self.delta_ratio)
+
+    def backup(self, deck_size: int, all_records: Callable[[], Iterable[Dict]],
+               changed_records: Callable[[Iterable[str]], Iterable[Dict]], full: bool = False) -> Path:
+        """写一次完整或增量备份 (full=True 强制完整备份); 记录通过回调按需取得, 逐条写入 gzip 流"""
+        if full or self.needs_full(deck_size):
+            path = self._write("full", all_records(), {})
+            self.base = path
+            self.changed_since_full = set()
+            self.deltas_since_full = 0
+            self.changed_file.write_text('', encoding='utf-8')
+            self._rotate()
+        else:
+            path = self._write("delta", changed_records(sorted(self.changed_since_full)),
+                               {'base': self.base.name})
+            self.deltas_since_full += 1
+        self.changes_since_backup = 0
+        self.last_backup_time = datetime.now().timestamp()
+        return path
+
+    def _write(self, kind: str, records: Iterable[Dict], header: Dict) -> Path:
+        created = datetime.now()
+        path = self.backup_dir / f"{kind}_{created.strftime(TIME_FORMAT)}.jsonl.gz"
+        tmp_file = path.with_name(path.name + '.tmp')
+        count = 0
+        with gzip.open(tmp_file, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(json.dumps({'kind': kind, 'created': created.isoformat(), **header}) + '\n')
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        os.replace(tmp_file, path)
+        logger.info(f"已创建{'完整' if kind == 'full' else '增量'}备份: {path.name} ({count}条记录)")
+        return path
+
+    def _rotate(self):
+        """只保留最近 backup_count 个完整备份, 删除基于已删除完整备份的增量"""
+        backups = self.list_backups()
+        fulls = [path for _, kind, path in backups if kind == "full"]
+        expired = fulls[:-self.backup_count] if self.backup_count > 0 else []
+        for path in expired:
+            path.unlink()
+        if not expired:
+            return
+        oldest_kept = self._created(fulls[len(expired)]) if len(fulls) > len(expired) else None
+        for created, kind, path in backups:
+            if kind == "delta" and (oldest_kept is None or created < oldest_kept):
+                path.unlink()
+
+    @staticmethod
+    def _created(path: Path) -> datetime:
+        return datetime.strptime(path.name[:-len(".jsonl.gz")].partition('_')[2], TIME_FORMAT)
+
+    @staticmethod
+    def read(path: Path) -> Tuple[Dict, Iterator[Dict]]:
+        """(头, 记录迭代器); 记录逐行解压解析"""
+        f = gzip.open(path, 'rt', encoding='utf-8')
+        header = json.loads(f.readline())
+
+        def records():
+            with f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        return header, records()
+
+    def restore(self, timestamp: Optional[datetime] = None) -> Dict[str, Dict]:
+        """timestamp (默认: 最新) 之前最后一个备份时的全部记录 {单词: 记录}"""
+        candidates = [entry for entry in self.list_backups() if timestamp is None or entry[0] <= timestamp]
+        if not candidates:
+            raise FileNotFoundError(f"没有 {timestamp or '任何时间'} 之前的备份")
+        _, kind, path = candidates[-1]
+        overlay: Dict[str, Dict] = {}
+        if kind == "delta":
+            header, delta_records = self.read(path)
+            overlay = {record['word_id']: record for record in delta_records}
+            path = self.backup_dir / header['base']
+        _, full_records = self.read(path)
+        records = {}
+        for record in full_records:
+            record = overlay.pop(record['word_id'], record)
+            records[record['word']] = record
+        # 完整备份之后新增的单词
+        for record in overlay.values():
+            records[record['word']] = record
+        return records
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Columnar Deck State for Word Memorizer
+列式调度状态 - 用 NumPy 数组保存整个词库的调度字段, 到期筛选、排序和统计都是向量化操作
+"""
+
+import random
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 有排序键的排序方式 (见 DeckColumns.priority); 其余方式按随机顺序
+ORDERINGS = ("difficulty", "performance", "interval", "overdue")
+
+# 列名与 dtype; 时间列为 epoch 秒
+# 顺序与延迟加载索引 (word, *取值) 中 word 之后的部分相同
+COLUMNS = {
+    'next_review': np.float64,
+    'interval': np.int64,
+    'easiness_factor': np.float64,
+    'last_review': np.float64,
+    'review_count': np.int64,
+    'correct_count': np.int64,
+    'consecutive_correct': np.int64,
+    'difficulty': np.int64,
+}
+
+
+def item_values(item) -> Tuple:
+    """WordItem 对应一行的取值, 顺序与 COLUMNS 相同"""
+    return (item.next_review_ts, item.interval, item.easiness_factor, item.last_review_ts,
+            item.review_count, item.correct_count, item.consecutive_correct, item.difficulty)
+
+
+def priority_key(column: Callable[[str], Any], method: str, difficulty_weight: float = 1.0,
+                 now: Optional[float] = None):
+    """排序键, 越小越先复习; method 为 ORDERINGS 之一。column(name) 返回该列的取值:
+    一组行的数组 (DeckColumns.priority) 或单个单词的标量 (item_priority), 两者共用这一份定义。
+    overdue: 逾期时长相对于间隔的倍数越大越靠前 (间隔 1 天逾期 3 天比间隔 60 天逾期 10 天更急)"""
+    if method == "difficulty":
+        return -(column('difficulty') * difficulty_weight)
+    if method == "performance":
+        reviews = column('review_count')
+        return np.where(reviews > 0, column('correct_count') / np.maximum(reviews, 1), 0.0)
+    if method == "interval":
+        return column('interval')
+    if method == "overdue":
+        now = datetime.now().timestamp() if now is None else now
+        overdue = (now - column('next_review')) / 86400.0
+        return -(overdue / np.maximum(column('interval'), 1))
+    raise ValueError(f"未知的排序方式: {method}")
+
+
+def item_priority(item, method: str, difficulty_weight: float = 1.0, now: Optional[float] = None) -> float:
+    """单个 WordItem 的排序键, 与 DeckColumns.priority 对同一单词给出的值相同"""
+    values = dict(zip(COLUMNS, item_values(item)))
+    return float(priority_key(values.__getitem__, method, difficulty_weight, now))
+
+
+class DeckColumns:
+    """struct-of-arrays 视图, 由 DataManager 在每次修改单词时同步"""
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.word_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self._data = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+    def load(self, rows: Iterable[Tuple[str, Tuple]]):
+        """整体替换内容 (对象本身不变, 持有引用的调度器无需更新): rows 为 (word_id, 取值元组)"""
+        rows = list(rows)
+        self.word_ids = [word_id for word_id, _ in rows]
+        self.row_of = {word_id: row for row, word_id in enumerate(self.word_ids)}
+        self.size = len(rows)
+        capacity = max(len(rows), 1024)
+        self._data = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        if rows:
+            table = np.array([values for _, values in rows], dtype=np.float64)
+            for index, name in enumerate(COLUMNS):
+                self._data[name][:len(rows)] = table[:, index]
+
+    def load_items(self, items: Iterable):
+        self.load((item.word_id, item_values(item)) for item in items)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """有效部分的列视图"""
+        return self._data[name][:self.size]
+
+    def _grow(self):
+        for name, array in self._data.items():
+            grown = np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._data[name] = grown
+
+    def upsert(self, item):
+        self.upsert_values(item.word_id, item_values(item))
+
+    def upsert_values(self, word_id: str, values: Tuple):
+        row = self.row_of.get(word_id)
+        if row is None:
+            if self.size == len(self._data['next_review']):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.word_ids.append(word_id)
+            self.row_of[word_id] = row
+        for name, value in zip(COLUMNS, values):
+            self._data[name][row] = value
+
+    def values(self, word_id: str) -> Optional[Tuple]:
+        """一行的取值 (顺序与 COLUMNS 相同), 不存在时为 None"""
+        row = self.row_of.get(word_id)
+        if row is None:
+            return None
+        return tuple(array[row].item() for array in self._data.values())
+
+    def remove(self, word_id: str):
+        """把最后一行移到被删除的位置"""
+        row = self.row_of.pop(word_id)
+        last = self.size - 1
+        if row != last:
+            moved = self.word_ids[last]
+            for array in self._data.values():
+                array[row] = array[last]
+            self.word_ids[row] = moved
+            self.row_of[moved] = row
+        self.word_ids.pop()
+        self.size -= 1
+
+    def rows(self, word_ids: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.row_of[word_id] for word_id in word_ids), dtype=np.int64)
+
+    def ids(self, rows: Iterable[int]) -> List[str]:
+        word_ids = self.word_ids
+        return [word_ids[row] for row in rows]
+
+    def split_due(self, now: float, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(已到期的行, 未到期的行); rows 为只考虑的行, 默认全部"""
+        if rows is None:
+            due = self['next_review'] <= now
+            return np.flatnonzero(due), np.flatnonzero(~due)
+        due = self['next_review'][rows] <= now
+        return rows[due], rows[~due]
+
+    def accuracy(self, rows: np.ndarray) -> np.ndarray:
+        reviews = self['review_count'][rows]
+        correct = self['correct_count'][rows]
+        return np.divide(correct, reviews, out=np.zeros(len(rows)), where=reviews > 0)
+
+    def priority(self, rows: np.ndarray, method: str, difficulty_weight: float = 1.0,
+                 now: Optional[float] = None) -> np.ndarray:
+        """rows 的排序键 (见 priority_key)"""
+        return priority_key(lambda name: self[name][rows], method, difficulty_weight, now)
+
+    def order(self, rows: np.ndarray, method: str, difficulty_weight: float = 1.0,
+              rng: Optional[random.Random] = None, now: Optional[float] = None) -> np.ndarray:
+        """按排序方式重排行号; 与 list.sort 一样是稳定排序, 不在 ORDERINGS 中的方式为随机顺序"""
+        if method not in ORDERINGS:
+            shuffled = list(rows)
+            (rng or random).shuffle(shuffled)
+            return np.asarray(shuffled, dtype=np.int64)
+        return rows[np.argsort(self.priority(rows, method, difficulty_weight, now), kind='stable')]
+
+    def select(self, rows: np.ndarray, k: int, method: str, difficulty_weight: float = 1.0,
+               rng: Optional[random.Random] = None, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(排在最前的 k 行, 已排序; 其余的行, 无序)。前 k 行与 order(rows)[:k] 相同 (随机方式为均匀抽样),
+        但只用 argpartition 选出前 k 个再排序, 代价 O(n + k log k)"""
+        n = len(rows)
+        if k >= n:
+            return self.order(rows, method, difficulty_weight, rng, now), rows[:0]
+        if k <= 0:
+            return rows[:0], rows
+        if method not in ORDERINGS:
+            chosen = np.array((rng or random).sample(range(n), k), dtype=np.int64)
+        else:
+            keys = self.priority(rows, method, difficulty_weight, now)
+            keys = np.where(np.isnan(keys), np.inf, keys)
+            kth = np.partition(keys, k - 1)[k - 1]
+            # 与稳定排序一致: 第 k 名的键有并列时取位置靠前的
+            less = np.flatnonzero(keys < kth)
+            ties = np.flatnonzero(keys == kth)[:k - len(less)]
+            chosen = np.concatenate([less, ties])
+            chosen = chosen[np.lexsort((chosen, keys[chosen]))]
+        rest = np.ones(n, dtype=bool)
+        rest[chosen] = False
+        return rows[chosen], rows[rest]
+
+    def item_stats(self, rows: Optional[np.ndarray] = None) -> Dict:
+        """单词组的聚合统计: 已复习数、正确率、平均难度/间隔/EF"""
+        select = (lambda name: self[name]) if rows is None else (lambda name: self[name][rows])
+        reviews = select('review_count')
+        count = len(reviews)
+        if count == 0:
+            return {'reviewed': 0, 'accuracy': 0.0, 'avg_difficulty': 0.0, 'avg_interval': 0.0, 'avg_ef': 0.0}
+        reviewed = reviews > 0
+        reviewed_count = int(reviewed.sum())
+        total_reviews = int(reviews.sum())
+        total_correct = int(select('correct_count').sum())
+        accuracy = (total_correct / total_reviews * 100) if total_reviews > 0 else 0
+        avg_difficulty = float(select('difficulty').sum()) / count
+        avg_interval = float(select('interval')[reviewed].sum()) / reviewed_count if reviewed_count else 0
+        avg_ef = float(select('easiness_factor')[reviewed].sum()) / reviewed_count if reviewed_count else 0
+        return {
+            'reviewed': reviewed_count,
+            'unreviewed': count - reviewed_count,
+            'accuracy': round(accuracy, 2),
+            'avg_difficulty': round(avg_difficulty, 2),
+            'avg_interval': round(avg_interval, 2),
+            'avg_ef': round(avg_ef, 2)
+        }
+
+    def difficulty_stats(self) -> Dict[int, Dict]:
+        difficulty = self['difficulty']
+        stats = {}
+        for level in np.unique(difficulty):
+            rows = np.flatnonzero(difficulty == level)
+            level_stats = self.item_stats(rows)
+            level_stats['count'] = len(rows)
+            stats[int(level)] = level_stats
+        return stats
+
+    def retention_rates(self) -> Dict[int, float]:
+        reviewed = self['review_count'] > 0
+        intervals, inverse = np.unique(self['interval'][reviewed], return_inverse=True)
+        correct = np.bincount(inverse, weights=self['correct_count'][reviewed], minlength=len(intervals))
+        total = np.bincount(inverse, weights=self['review_count'][reviewed], minlength=len(intervals))
+        return {int(interval): round(float(c / t * 100), 2)
+                for interval, c, t in zip(intervals, correct, total) if t > 0}
@@ -4,18 +4,39 @@ Core Logic Module for Word Memorizer - Enhanced Version
 精简版
 """
 
+import bisect
 import json
 import csv
 import random
-import heapq
 import os
 import logging
+import sys
+import threading
 import uuid
-from collections import deque, defaultdict
-from dataclasses import dataclass, asdict, field
-from datetime import datetime, timedelta
+from collections import deque
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__))) # 工作目录定义为根目录
+
+from logic.storage import ProgressStorage, create_storage, migrate_from_json
+from logic.persistence import PersistenceWorker
+from logic.lazy import LazyWordStore
+from logic.columnar import ORDERINGS, DeckColumns, item_priority, item_values
+from logic.aggregates import StatsAggregator
+from logic.tag_index import TagIndex, parse_query, matches
+from logic.timeseries import ReviewTimeSeries
+from logic.backup import BackupManager
+from logic.due_calendar import DueCalendar
+from logic.priority_queue import IndexedPriorityQueue
+from logic import sm2
+from logic.forecast import prepare_state, simulate
+from logic.optimizer import optimize
+from logic.analytics import forgetting_curves
+from logic.event_log import EventLog
 
 logging.basicConfig(
     level=logging.INFO,
@@ -34,49 +55,147 @@ class ReviewParameters:
     bonus_factor: float = 0.1
     consecutive_bonus: int = 3
 
-@dataclass
+# 没有例句/同义词/反义词的单词共享同一个空元组
+_EMPTY: Tuple[str, ...] = ()
+
+def _to_timestamp(value) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+def _to_iso(timestamp: Optional[float]) -> Optional[str]:
+    return None if timestamp is None else datetime.fromtimestamp(timestamp).isoformat()
+
+def _stats_close(actual, expected, tolerance: float = 0.011) -> bool:
+    """统计结果比较: 数值允许舍入误差 (增量累加的浮点和与重算的差别只在末位)"""
+    if isinstance(expected, dict):
+        return (isinstance(actual, dict) and actual.keys() == expected.keys()
+                and all(_stats_close(actual[key], expected[key], tolerance) for key in expected))
+    if isinstance(expected, list):
+        return (isinstance(actual, list) and len(actual) == len(expected)
+                and all(_stats_close(a, e, tolerance) for a, e in zip(actual, expected)))
+    if isinstance(expected, float) or isinstance(actual, float):
+        return abs(actual - expected) <= tolerance
+    return actual == expected
+
+def _to_tuple(values, intern: bool = False, unique: bool = False) -> Tuple[str, ...]:
+    """unique 时去掉重复的值, 保留第一次出现的顺序"""
+    if not values:
+        return _EMPTY
+    if intern:
+        values = (sys.intern(v) for v in values)
+    return tuple(dict.fromkeys(values)) if unique else tuple(values)
+
+def _timestamp_property(slot: str) -> property:
+    """对外读写 ISO 字符串, 内部保存 epoch 秒"""
+    return property(lambda self: _to_iso(getattr(self, slot)),
+                    lambda self, value: setattr(self, slot, _to_timestamp(value)))
+
+def _tuple_property(slot: str, intern: bool = False, unique: bool = False) -> property:
+    return property(lambda self: getattr(self, slot),
+                    lambda self, value: setattr(self, slot, _to_tuple(value, intern, unique)))
+
 class WordItem:
-    word: str
-    meaning: str
-    pronunciation: str = ""
-    difficulty: int = 1
-    review_count: int = 0
-    correct_count: int = 0
-    consecutive_correct: int = 0
-    last_review: Optional[str] = None
-    next_review: Optional[str] = None
-    easiness_factor: float = 2.5
-    interval: int = 1
-    tags: List[str] = field(default_factory=list)
-    examples: List[str] = field(default_factory=list)
-    synonyms: List[str] = field(default_factory=list)
-    antonyms: List[str] = field(default_factory=list)
-    word_id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    
-    def __post_init__(self):
-        if not self.word or not self.meaning:
+    """
+    单词条目。时间字段在内部保存为 epoch 秒 (*_ts), 只在序列化边界
+    (to_dict / 属性读取) 转换为 ISO 字符串; 列表字段保存为元组, 标签字符串被 intern。
+    """
+    __slots__ = ('word', 'meaning', 'pronunciation', 'difficulty', 'review_count', 'correct_count',
+                 'consecutive_correct', 'last_review_ts', 'next_review_ts', 'easiness_factor', 'interval',
+                 '_tags', '_examples', '_synonyms', '_antonyms', 'word_id', 'created_ts', 'updated_ts')
+    
+    def __init__(self, word: str, meaning: str, pronunciation: str = "", difficulty: int = 1,
+                 review_count: int = 0, correct_count: int = 0, consecutive_correct: int = 0,
+                 last_review=None, next_review=None, easiness_factor: float = 2.5, interval: int = 1,
+                 tags=None, examples=None, synonyms=None, antonyms=None,
+                 word_id: Optional[str] = None, created_at=None, updated_at=None):
+        if not word or not meaning:
             raise ValueError("单词和释义不能为空")
-        if self.difficulty < 1 or self.difficulty > 5:
+        if difficulty < 1 or difficulty > 5:
             raise ValueError("难度等级必须在1-5之间")
-        if self.last_review is None:
-            self.last_review = datetime.now().isoformat()
-        if self.next_review is None:
-            self.next_review = datetime.now().isoformat()
-        if self.easiness_factor < 1.3:
-            self.easiness_factor = 1.3
-        self.updated_at = datetime.now().isoformat()
+        now = datetime.now().timestamp()
+        self.word = word
+        self.meaning = meaning
+        self.pronunciation = pronunciation
+        self.difficulty = difficulty
+        self.review_count = review_count
+        self.correct_count = correct_count
+        self.consecutive_correct = consecutive_correct
+        self.last_review_ts = now if last_review is None else _to_timestamp(last_review)
+        self.next_review_ts = now if next_review is None else _to_timestamp(next_review)
+        self.easiness_factor = max(1.3, easiness_factor)
+        self.interval = interval
+        self.tags = tags
+        self.examples = examples
+        self.synonyms = synonyms
+        self.antonyms = antonyms
+        self.word_id = word_id or str(uuid.uuid4())
+        self.created_ts = now if created_at is None else _to_timestamp(created_at)
+        self.updated_ts = now if updated_at is None else _to_timestamp(updated_at)
+    
+    last_review = _timestamp_property('last_review_ts')
+    next_review = _timestamp_property('next_review_ts')
+    created_at = _timestamp_property('created_ts')
+    updated_at = _timestamp_property('updated_ts')
+    # 标签是集合语义 (CSV 中的 "a,a" 只算一个), 标签索引和统计都依赖这一点
+    tags = _tuple_property('_tags', intern=True, unique=True)
+    examples = _tuple_property('_examples')
+    synonyms = _tuple_property('_synonyms')
+    antonyms = _tuple_property('_antonyms')
+    
+    def touch(self, timestamp: Optional[float] = None):
+        self.updated_ts = datetime.now().timestamp() if timestamp is None else timestamp
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            'word': self.word,
+            'meaning': self.meaning,
+            'pronunciation': self.pronunciation,
+            'difficulty': self.difficulty,
+            'review_count': self.review_count,
+            'correct_count': self.correct_count,
+            'consecutive_correct': self.consecutive_correct,
+            'last_review': self.last_review,
+            'next_review': self.next_review,
+            'easiness_factor': self.easiness_factor,
+            'interval': self.interval,
+            'tags': list(self._tags),
+            'examples': list(self._examples),
+            'synonyms': list(self._synonyms),
+            'antonyms': list(self._antonyms),
+            'word_id': self.word_id,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+    
+    def __repr__(self) -> str:
+        return f"WordItem(word={self.word!r}, word_id={self.word_id!r}, interval={self.interval})"
 
 class ReviewScheduler:
+    # 内存中最多保留的最近复习事件数; 完整历史在 event_log 中
+    history_limit = 1000
+    
     def __init__(self, params: ReviewParameters = ReviewParameters()):
         self.words_queue = deque()
-        self.review_heap = []
+        # 未进入当前队列的单词按 next_review 放在分层时间轮里; 每个单词只有一项, 出队时通过 item_lookup 取回 WordItem
+        self.due_calendar = DueCalendar()
+        # 会话内重学: 答错的单词在之后第 N 张卡片时重新出现, 以已出卡片数为优先级
+        self.relearn_queue = IndexedPriorityQueue()
+        self.relearn_step: Dict[str, int] = {}
+        self.cards_served = 0
+        # 本次会话从队列 (不含重学) 取出的卡片数; 它和队列中的单词数合计不超过 review_limit
+        self.queue_served = 0
+        self.item_lookup = None
+        # DataManager 的列式调度状态, 设置后排序走向量化路径
+        self.columns: Optional[DeckColumns] = None
         self.params = params
-        self.session_history = []
+        # 最近的复习事件 (环形缓冲); 设置了 event_log 时每个事件同时写入日志
+        self.session_history = deque(maxlen=self.history_limit)
+        self.event_log: Optional[EventLog] = None
+        # 复习更新单词后的回调, MemorizerCore 用它把单词登记为待保存
+        self.on_item_updated = None
 
     def calculate_next_review(self, item: WordItem, quality: int) -> Tuple[int, float]:
         if quality < self.params.min_quality or quality > self.params.perfect_score:
@@ -106,22 +225,17 @@ class ReviewScheduler:
             new_ef = max(self.params.min_easiness, item.easiness_factor + ef_change)
         
         new_interval = int(new_interval * self.params.interval_modifier)
-        
-        decision_log = {
-            'timestamp': datetime.now().isoformat(),
-            'word_id': item.word_id,
-            'quality': quality,
-            'old_interval': item.interval,
-            'new_interval': new_interval,
-            'old_ef': item.easiness_factor,
-            'new_ef': new_ef,
-            'consecutive': item.consecutive_correct
-        }
-        self.session_history.append(decision_log)
-        
         return new_interval, new_ef
     
-    def update_item_after_review(self, item: WordItem, is_correct: bool, quality: int = None):
+    def calculate_next_reviews(self, interval: np.ndarray, easiness: np.ndarray, consecutive: np.ndarray,
+                               quality: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """calculate_next_review 的向量版本 (不修改单词), 返回 (间隔, EF, 连续答对数) 数组"""
+        return sm2.next_review(interval, easiness, consecutive, quality, self.params)
+    
+    def update_item_after_review(self, item: WordItem, is_correct: bool, quality: int = None,
+                                 review_time: Optional[float] = None, notify: bool = True):
+        """review_time 为复习发生的时间 (epoch 秒, 默认现在), 导入历史答题时按原时间计算下次复习;
+        notify=False 时不调用 on_item_updated, 由批量调用方统一登记"""
         if quality is None:
             quality = self.params.perfect_score if is_correct else self.params.min_quality
         if quality < self.params.min_quality or quality > self.params.perfect_score:
@@ -131,15 +245,19 @@ class ReviewScheduler:
         if is_correct:
             item.correct_count += 1
         
+        old_interval, old_ef = item.interval, item.easiness_factor
         new_interval, new_ef = self.calculate_next_review(item, quality)
         item.interval = new_interval
         item.easiness_factor = new_ef
-        item.last_review = datetime.now().isoformat()
-        next_review_date = datetime.now() + timedelta(days=new_interval)
-        item.next_review = next_review_date.isoformat()
-        item.updated_at = datetime.now().isoformat()
+        now = datetime.now().timestamp()
+        reviewed_at = now if review_time is None else review_time
+        item.last_review_ts = reviewed_at
+        item.next_review_ts = reviewed_at + timedelta(days=new_interval).total_seconds()
+        item.touch(now)
         
-        heapq.heappush(self.review_heap, (next_review_date.timestamp(), item))
+        self.due_calendar.push(item.word_id, item.next_review_ts)
+        if notify and self.on_item_updated:
+            self.on_item_updated(item)
         
         review_event = {
             'word': item.word,
@@ -149,65 +267,142 @@ class ReviewScheduler:
             'quality': quality,
             'next_review': item.next_review,
             'interval': new_interval,
-            'easiness': new_ef
+            'easiness': new_ef,
+            'old_interval': old_interval,
+            'old_ef': old_ef,
+            'consecutive': item.consecutive_correct
         }
         self.session_history.append(review_event)
+        if self.event_log is not None:
+            self.event_log.append(review_event)
     
-    def get_due_items(self, limit: int = 50) -> List[WordItem]:
+    def get_due_items(self, limit: int = 50, accept: Optional[Callable[[str], bool]] = None) -> List[WordItem]:
+        """取出到期的单词; accept 返回 False 的单词留在到期日历中"""
         due_items = []
         current_time = datetime.now().timestamp()
         
-        while self.review_heap and self.review_heap[0][0] <= current_time and len(due_items) < limit:
-            _, item = heapq.heappop(self.review_heap)
-            due_items.append(item)
+        for _, word_id in self.due_calendar.pop_until(current_time, limit, accept):
+            item = self.item_lookup(word_id)
+            if item is not None:
+                due_items.append(item)
         return due_items
     
-    def shuffle_queue(self, method: str = "random"):
+    def schedule_relearning(self, item: WordItem, is_correct: bool, steps: List[int]):
+        """答错进入 (或重新开始) 重学步骤; 重学中答对进入下一步, 走完所有步骤后离开本次会话"""
+        word_id = item.word_id
+        if not is_correct:
+            step = 0
+        elif word_id in self.relearn_step:
+            step = self.relearn_step[word_id] + 1
+        else:
+            return
+        if step >= len(steps):
+            self.relearn_step.pop(word_id, None)
+            return
+        self.relearn_step[word_id] = step
+        self.relearn_queue.push(word_id, self.cards_served + steps[step])
+    
+    def next_relearning(self, force: bool = False) -> Optional[str]:
+        """已到出现位置的重学单词; force=True 时即使未到也取出 (没有别的卡片可出时)"""
+        top = self.relearn_queue.peek()
+        if top is None or (not force and top[0] > self.cards_served):
+            return None
+        return self.relearn_queue.pop()[1]
+    
+    def reset_session(self):
+        self.relearn_queue.clear()
+        self.relearn_step.clear()
+        self.cards_served = 0
+        self.queue_served = 0
+    
+    def shuffle_queue(self, method: str = "random", difficulty_weight: float = 1.0):
         if not self.words_queue:
             return
             
         queue_list = list(self.words_queue)
-        if method == "random":
+        if self.columns is not None and method in ORDERINGS:
+            rows = self.columns.order(self.columns.rows(item.word_id for item in queue_list),
+                                      method, difficulty_weight)
+            by_id = {item.word_id: item for item in queue_list}
+            self.words_queue = deque(by_id[word_id] for word_id in self.columns.ids(rows))
+            return
+        if method in ORDERINGS:
+            now = datetime.now().timestamp()
+            queue_list.sort(key=lambda item: item_priority(item, method, difficulty_weight, now))
+        else:
             random.shuffle(queue_list)
-        elif method == "difficulty":
-            queue_list.sort(key=lambda x: x.difficulty, reverse=True)
-        elif method == "performance":
-            queue_list.sort(key=lambda x: x.correct_count / x.review_count if x.review_count > 0 else 0)
-        elif method == "interval":
-            queue_list.sort(key=lambda x: x.interval)
         self.words_queue = deque(queue_list)
     
     def clear_history(self):
-        self.session_history = []
+        """清空内存中的最近事件; 已写入 event_log 的历史保留"""
+        self.session_history.clear()
+        if self.event_log is not None:
+            self.event_log.flush()
     
     def get_review_history(self) -> List[Dict]:
-        return self.session_history
+        """最近的 history_limit 个复习事件"""
+        return list(self.session_history)
+    
+    def iter_review_history(self, since: Optional[float] = None) -> Iterator[Dict]:
+        """按记录顺序遍历完整的复习历史 (since 为起始时间戳); 没有事件日志时只有内存中的最近事件"""
+        if self.event_log is not None:
+            return self.event_log.iter_events(since)
+        return (event for event in list(self.session_history)
+                if since is None or _to_timestamp(event['timestamp']) >= since)
 
 class DataManager:
-    def __init__(self, data_dir: str = "data", backup_count: int = 5):
+    # 调试: 每次 get_statistics 都与全量重算的结果比对, 不一致时记录错误
+    verify_stats = False
+    
+    def __init__(self, data_dir: str = "data", backup_count: int = 5, compact_threshold: int = 1000,
+                 storage: Any = "json", lazy: bool = False, resident_limit: int = 10000):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True, parents=True)
         self.backup_count = backup_count
         self.words: Dict[str, WordItem] = {}
         self.word_id_index: Dict[str, WordItem] = {}
+        # 延迟加载模式: 启动时只读调度索引, 完整单词按需构建, 常驻数量不超过 resident_limit
+        self.lazy = lazy
+        self.resident_limit = resident_limit
+        self.lazy_store: Optional[LazyWordStore] = None
         self.progress_file = self.data_dir / "progress.json"
         self.backup_dir = self.data_dir / "backups"
-        self.backup_dir.mkdir(exist_ok=True)
+        # 按时间/修改数策略做完整+增量备份, 不再在每次保存时复制整个进度文件
+        self.backups = BackupManager(self.backup_dir, backup_count)
         self.stats_file = self.data_dir / "statistics.json"
         self.import_history_file = self.data_dir / "import_history.csv"
+        self.review_params_file = self.data_dir / "review_params.json"
+        # storage 可以是 "json" / "binary" / "sqlite" 或自定义的 ProgressStorage 实例
+        if isinstance(storage, ProgressStorage):
+            self.storage = storage
+        else:
+            self.storage = create_storage(storage, self.data_dir, compact_threshold)
+        if self.lazy and not self.storage.supports_lazy:
+            # JSON 快照只能整体解析, 延迟加载时仍要在内存里保留全部记录, 反而比完整加载占用更多
+            logger.warning(f"{self.storage.name} 存储不支持延迟加载, 改为完整加载 (延迟加载请使用 binary 或 sqlite)")
+            self.lazy = False
+        # lock 保护内存中的单词数据 (持有时间很短), io_lock 串行化对存储后端的写入
+        self.lock = threading.RLock()
+        self.io_lock = threading.Lock()
+        # 上次保存后修改过的 word_id, 增量保存只写这些记录
+        self.dirty_ids = set()
+        self.on_dirty = None
+        # 全词库调度字段的列式副本, 到期筛选/排序/统计在上面向量化完成
+        self.columns = DeckColumns()
+        # 按难度/标签/间隔维护的统计累加和, 在 mark_dirty 中随单词一起更新
+        self.stats = StatsAggregator()
+        self.tag_index = TagIndex()
+        # 由复习事件累加的每小时/每天复习数、答对数和用时
+        self.timeseries = ReviewTimeSeries(self.data_dir / "timeseries.json")
+        # 复习事件日志 (由 MemorizerCore 设置), 每次保存时一起落盘
+        self.event_log: Optional[EventLog] = None
+        # 词库数据的版本号, 每次修改 (mark_dirty / 记录复习 / 重新加载) 加一; 统计结果按 (版本, 日期) 缓存
+        self.version = 0
+        self._stats_cache: Optional[Tuple[Tuple[int, date], Dict]] = None
+        self.last_save_count = 0
+        self.records_written = 0
+        self.last_import_ids: List[str] = []
         
-    def _create_backup(self, file_path: Path):
-        if not file_path.exists():
-            return
-        backups = sorted(self.backup_dir.glob(f"{file_path.stem}_backup_*"), 
-                         key=os.path.getmtime, reverse=True)
-        for old_backup in backups[self.backup_count - 1:]:
-            old_backup.unlink()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = self.backup_dir / f"{file_path.stem}_backup_{timestamp}{file_path.suffix}"
-        with open(file_path, 'rb') as src, open(backup_file, 'wb') as dst:
-            dst.write(src.read())
-    
     def _validate_word_data(self, row: Dict) -> bool:
         required_fields = ['word', 'meaning']
         for field in required_fields:
@@ -224,6 +419,8 @@ class DataManager:
         count = 0
         new_words = 0
         updated_words = 0
+        # 本次导入新增或更新的 word_id, 供会话队列增量更新
+        self.last_import_ids = []
         try:
             with open(csv_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
@@ -241,7 +438,9 @@ class DataManager:
                         existing.pronunciation = row.get('pronunciation', existing.pronunciation)
                         existing.difficulty = int(row.get('difficulty', existing.difficulty))
                         existing.tags = row.get('tags', '').split(',') if 'tags' in row else existing.tags
-                        existing.updated_at = datetime.now().isoformat()
+                        existing.touch()
+                        self.mark_dirty(existing)
+                        self.last_import_ids.append(existing.word_id)
                         updated_words += 1
                         continue
                     
@@ -265,6 +464,8 @@ class DataManager:
                     
                     self.words[word] = word_item
                     self.word_id_index[word_item.word_id] = word_item
+                    self.mark_dirty(word_item)
+                    self.last_import_ids.append(word_item.word_id)
                     count += 1
                     new_words += 1
             
@@ -292,71 +493,242 @@ class DataManager:
                 len(self.words)
             ])
     
+    def mark_dirty(self, item: WordItem, notify: bool = True):
+        """登记一个被修改的单词, 下次保存时只写入这些记录; notify=False 时不通知后台写盘 (调用方自行保存)"""
+        self.dirty_ids.add(item.word_id)
+        self.version += 1
+        values = item_values(item)
+        self.stats.update(item.word_id, self.columns.values(item.word_id), values, item.tags)
+        self.tag_index.update(item.word_id, item.tags)
+        self.columns.upsert_values(item.word_id, values)
+        if self.lazy_store is not None:
+            # 未保存的修改不能被 LRU 淘汰
+            self.lazy_store.pin(item)
+        if notify and self.on_dirty:
+            self.on_dirty()
+    
+    @property
+    def dirty_count(self) -> int:
+        return len(self.dirty_ids)
+    
+    def _count_saved(self, count: int, word_ids=()):
+        self.last_save_count = count
+        self.records_written += count
+        self.backups.note_saved(word_ids)
+        if self.lazy_store is not None:
+            with self.lock:
+                # 写盘期间又被修改的单词存储里还是旧值, 继续固定
+                self.lazy_store.release(set(word_ids) - self.dirty_ids)
+    
+    def _snapshot_records(self) -> Dict[str, Dict]:
+        with self.lock:
+            if self.lazy_store is not None:
+                return dict(self.lazy_store.records())
+            return {k: v.to_dict() for k, v in self.words.items()}
+    
+    def _records_for(self, word_ids) -> List[Dict]:
+        with self.lock:
+            if self.lazy_store is not None:
+                return [self.lazy_store.record(word_id) for word_id in word_ids if word_id in self.word_id_index]
+            return [self.word_id_index[word_id].to_dict() for word_id in word_ids if word_id in self.word_id_index]
+    
+    def _save_timeseries(self):
+        with self.lock:
+            # 缓冲中的复习事件随每次保存落盘; 退出时 PersistenceWorker.stop 的最后一次保存会写入剩余事件。
+            # events_folded 不能超过已落盘的事件数, 否则重启时会跳过之后写入日志的事件: 事件写入失败时
+            # 时间序列也先不保存, 留到下次
+            if self.event_log is not None and not self.event_log.flush():
+                return
+            self.timeseries.save()
+    
+    def _maybe_backup(self, records: Optional[Dict[str, Dict]] = None, force: bool = False):
+        """备份策略到期时写备份; records 为刚写入的完整快照, 有则直接复用"""
+        if not (force or self.backups.due()):
+            return
+        try:
+            self.backups.backup(len(self.word_id_index),
+                                lambda: (records if records is not None else self._snapshot_records()).values(),
+                                self._records_for, full=force)
+        except Exception as e:
+            logger.error(f"创建备份失败: {e}")
+    
     def save_progress(self) -> bool:
+        """写入完整快照"""
+        with self.lock:
+            records = self._snapshot_records()
+            dirty_ids, self.dirty_ids = self.dirty_ids, set()
         try:
-            if self.progress_file.exists():
-                self._create_backup(self.progress_file)
-            
-            progress_data = {
-                'version': '2.0',
-                'timestamp': datetime.now().isoformat(),
-                'word_count': len(self.words),
-                'words': {k: v.to_dict() for k, v in self.words.items()}
-            }
-            
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
+            with self.io_lock:
+                self.storage.save_all(records)
+            self._count_saved(len(records), dirty_ids)
+            self._maybe_backup(records)
+            self._save_timeseries()
             self.save_statistics()
-            logger.info(f"学习进度已保存 ({len(self.words)}个单词)")
+            logger.info(f"学习进度已保存 ({len(records)}个单词, {self.storage.name})")
             return True
         except Exception as e:
+            with self.lock:
+                self.dirty_ids |= dirty_ids
             logger.error(f"保存进度失败: {e}")
             return False
     
+    def save_dirty(self) -> bool:
+        """增量保存: 只写入上次保存后修改过的单词"""
+        if not self.storage.exists():
+            # 增量记录依赖已有快照, 先写一次完整快照
+            return self.save_progress()
+        with self.lock:
+            dirty_ids, self.dirty_ids = self.dirty_ids, set()
+            records = [self.word_id_index[word_id].to_dict()
+                       for word_id in dirty_ids if word_id in self.word_id_index]
+        self._save_timeseries()
+        if not records:
+            self._count_saved(0)
+            return True
+        try:
+            with self.io_lock:
+                needs_compaction = self.storage.write_records(records, len(self.words))
+        except Exception as e:
+            with self.lock:
+                self.dirty_ids |= dirty_ids
+            logger.error(f"增量保存失败: {e}")
+            return False
+        self._count_saved(len(records), dirty_ids)
+        logger.debug(f"增量保存 {len(records)} 个单词")
+        if needs_compaction:
+            return self.save_progress()
+        self._maybe_backup()
+        return True
+    
     def load_progress(self) -> bool:
-        if not self.progress_file.exists():
+        if self.storage.name != "json" and not self.storage.exists():
+            migrate_from_json(self.data_dir, self.storage)
+        if not self.storage.exists():
             logger.info("进度文件不存在，使用默认数据")
             return False
             
         try:
-            with open(self.progress_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if self.lazy:
+                return self._load_index()
+            records = self.storage.load()
             
             self.words.clear()
             self.word_id_index.clear()
             
-            for word, word_data in data.get('words', {}).items():
+            for word, word_data in records.items():
                 try:
                     word_item = WordItem(**word_data)
                     self.words[word] = word_item
                     self.word_id_index[word_item.word_id] = word_item
                 except Exception as e:
                     logger.error(f"加载单词 '{word}' 失败: {e}")
+            self.columns.load_items(self.word_id_index.values())
+            word_tags = [(word_id, item.tags) for word_id, item in self.word_id_index.items()]
+            self.stats.load(self.columns, word_tags)
+            self.tag_index.load(word_tags)
+            self.version += 1
             logger.info(f"成功加载进度: {len(self.words)}个单词")
             return True
         except Exception as e:
             logger.error(f"加载进度失败: {e}")
             return False
     
+    def restore_backup(self, timestamp: Optional[datetime] = None) -> bool:
+        """恢复到 timestamp (默认: 最新) 之前最后一个备份的状态; 恢复前先完整备份当前状态"""
+        try:
+            records = self.backups.restore(timestamp)
+        except Exception as e:
+            logger.error(f"读取备份失败: {e}")
+            return False
+        self._maybe_backup(force=True)
+        try:
+            with self.io_lock:
+                self.storage.save_all(records)
+        except Exception as e:
+            logger.error(f"恢复备份失败: {e}")
+            return False
+        # 恢复后的状态作为之后增量备份的基础, 否则增量会叠加在恢复前的完整备份上
+        self._maybe_backup(records, force=True)
+        with self.lock:
+            self.dirty_ids = set()
+        logger.info(f"已从备份恢复 {len(records)} 个单词")
+        return self.load_progress()
+    
+    def load_review_params(self) -> Optional[ReviewParameters]:
+        """读取保存的调度参数; 文件中多余的字段会被忽略"""
+        if not self.review_params_file.exists():
+            return None
+        try:
+            with open(self.review_params_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except Exception as e:
+            logger.error(f"读取调度参数失败: {e}")
+            return None
+        names = {field.name for field in fields(ReviewParameters)}
+        return ReviewParameters(**{key: value for key, value in saved.items() if key in names})
+    
+    def save_review_params(self, params: ReviewParameters) -> bool:
+        tmp_file = self.review_params_file.with_suffix('.tmp')
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(asdict(params), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.review_params_file)
+        except Exception as e:
+            logger.error(f"保存调度参数失败: {e}")
+            return False
+        return True
+    
+    def _load_index(self) -> bool:
+        index = self.storage.load_index()
+        self.lazy_store = LazyWordStore(index, self.storage.load_record, WordItem, self.resident_limit,
+                                        self.lock)
+        self.words = self.lazy_store.by_word
+        self.word_id_index = self.lazy_store.by_id
+        self.columns.load((word_id, entry[1:]) for word_id, entry in index.items())
+        # 标签不在调度索引里, 标签统计和标签索引在第一次用到时再建立
+        self.stats.load(self.columns)
+        self.tag_index.reset()
+        self.version += 1
+        logger.info(f"成功加载调度索引: {len(index)}个单词 (延迟加载)")
+        return True
+    
     def save_statistics(self):
-        stats = self.get_statistics()
+        with self.lock:
+            stats = self.get_statistics()
         try:
             with open(self.stats_file, 'w', encoding='utf-8') as f:
                 json.dump(stats, f, ensure_ascii=False, indent=2)
         except Exception as e:
             logger.error(f"保存统计信息失败: {e}")
     
+    def record_review(self, timestamp: float, correct: bool, seconds: float = 0.0):
+        """把一次复习计入时间序列, 调用方持有 lock"""
+        self.timeseries.record(timestamp, correct, seconds)
+        self.version += 1
+    
     def get_statistics(self) -> Dict:
-        word_stats = self._calculate_item_stats(self.words.values())
-        difficulty_stats = self._get_difficulty_stats()
-        tag_stats = self._get_tag_stats()
-        retention_rates = self._get_retention_rates()
-        
+        """由增量统计直接给出, 代价只与难度/标签/间隔分组的数量有关。
+        版本号和日期都没变时直接返回上次的结果 (同一个 dict, 调用方不要修改)"""
+        with self.lock:
+            key = (self.version, date.today())
+            if self._stats_cache is not None and self._stats_cache[0] == key:
+                return self._stats_cache[1]
+            self._load_tags()
+            stats = self.stats.statistics()
+            result = self._format_statistics(stats['words'], stats['difficulty'], stats['tags'],
+                                             stats['retention'])
+            if self.verify_stats:
+                self._verify_statistics(result)
+            self._stats_cache = (key, result)
+        return result
+    
+    def _format_statistics(self, word_stats: Dict, difficulty_stats: Dict, tag_stats: Dict,
+                           retention_rates: Dict) -> Dict:
         return {
             'words': {
-                'total': len(self.words),
+                'total': word_stats['reviewed'] + word_stats['unreviewed'],
                 'reviewed': word_stats['reviewed'],
-                'unreviewed': len(self.words) - word_stats['reviewed'],
+                'unreviewed': word_stats['unreviewed'],
                 'accuracy': word_stats['accuracy'],
                 'avg_difficulty': word_stats['avg_difficulty'],
                 'avg_interval': word_stats['avg_interval'],
@@ -365,96 +737,77 @@ class DataManager:
             'difficulty': difficulty_stats,
             'tags': tag_stats,
             'retention': retention_rates,
-            'daily_progress': self._get_daily_progress(),
+            'daily_progress': self.get_daily_progress(),
             'last_updated': datetime.now().isoformat()
         }
     
-    def _calculate_item_stats(self, items) -> Dict:
-        if not items:
-            return {'reviewed': 0, 'accuracy': 0.0, 'avg_difficulty': 0.0, 'avg_interval': 0.0, 'avg_ef': 0.0}
-            
-        reviewed_items = [item for item in items if item.review_count > 0]
-        total_reviews = sum(item.review_count for item in items)
-        total_correct = sum(item.correct_count for item in items)
-        total_interval = sum(item.interval for item in reviewed_items)
-        total_ef = sum(item.easiness_factor for item in reviewed_items)
-        
-        accuracy = (total_correct / total_reviews * 100) if total_reviews > 0 else 0
-        avg_difficulty = sum(item.difficulty for item in items) / len(items)
-        avg_interval = total_interval / len(reviewed_items) if reviewed_items else 0
-        avg_ef = total_ef / len(reviewed_items) if reviewed_items else 0
-        
-        return {
-            'reviewed': len(reviewed_items),
-            'unreviewed': len(items) - len(reviewed_items),
-            'accuracy': round(accuracy, 2),
-            'avg_difficulty': round(avg_difficulty, 2),
-            'avg_interval': round(avg_interval, 2),
-            'avg_ef': round(avg_ef, 2)
-        }
+    def _compute_statistics(self) -> Dict:
+        """全量重算 (在列式状态上), 用于核对增量统计"""
+        word_stats = self.columns.item_stats()
+        word_stats.setdefault('unreviewed', 0)
+        return self._format_statistics(word_stats, self._get_difficulty_stats(), self._get_tag_stats(),
+                                       self._get_retention_rates())
+    
+    def _verify_statistics(self, stats: Dict):
+        expected = self._compute_statistics()
+        mismatched = [key for key in ('words', 'difficulty', 'tags', 'retention')
+                      if not _stats_close(stats[key], expected[key])]
+        if mismatched:
+            logger.error(f"增量统计与全量重算不一致: {', '.join(mismatched)}")
+        return not mismatched
+    
+    def _load_tags(self):
+        """建立还没有建立的标签统计和标签索引 (延迟加载模式下第一次用到标签时), 调用方持有 lock"""
+        if self.stats.tags_loaded and self.tag_index.loaded:
+            return
+        word_tags = list(self._word_tags())
+        if not self.stats.tags_loaded:
+            self.stats.load_tags(self.columns, word_tags)
+        if not self.tag_index.loaded:
+            self.tag_index.load(word_tags)
+    
+    def query_tags(self, expression: str) -> Set[str]:
+        """满足标签查询 (如 "cet6 AND NOT verb", 语法见 logic/tag_index.py, 也可以是 parse_query 的结果) 的 word_id 集合"""
+        with self.lock:
+            self._load_tags()
+            return self.tag_index.query(expression, lambda: self.columns.word_ids)
+    
+    def get_tags(self) -> List[str]:
+        with self.lock:
+            self._load_tags()
+            return self.tag_index.tags()
+    
+    def _word_tags(self) -> Iterable[Tuple[str, Iterable[str]]]:
+        """所有单词的 (word_id, 标签); 延迟加载模式下不构建 WordItem"""
+        if self.lazy_store is None:
+            return ((word_id, item.tags) for word_id, item in self.word_id_index.items())
+        # 存储后端只解码标签; 未保存的修改还不在存储里
+        tags = dict(self.storage.load_tags())
+        tags.update((item.word_id, item.tags) for item in self.lazy_store.pinned())
+        return ((word_id, word_tags) for word_id, word_tags in tags.items() if word_id in self.lazy_store.index)
     
     def _get_difficulty_stats(self) -> Dict[int, Dict]:
-        difficulty_groups = defaultdict(list)
-        for item in self.words.values():
-            difficulty_groups[item.difficulty].append(item)
-        
-        stats = {}
-        for level, items in difficulty_groups.items():
-            level_stats = self._calculate_item_stats(items)
-            level_stats['count'] = len(items)
-            stats[level] = level_stats
-        return stats
+        return self.columns.difficulty_stats()
     
     def _get_tag_stats(self) -> Dict[str, Dict]:
-        tag_groups = defaultdict(list)
-        for item in self.words.values():
-            for tag in item.tags:
-                tag_groups[tag].append(item)
-        
+        # 标签不在列式状态中, 按标签索引取 word_id, 数值聚合仍在列上完成
+        self._load_tags()
         stats = {}
-        for tag, items in tag_groups.items():
-            tag_stats = self._calculate_item_stats(items)
-            tag_stats['count'] = len(items)
+        for tag, word_ids in self.tag_index.words.items():
+            tag_stats = self.columns.item_stats(self.columns.rows(word_ids))
+            tag_stats['count'] = len(word_ids)
             stats[tag] = tag_stats
         return stats
     
     def _get_retention_rates(self) -> Dict[int, float]:
-        interval_groups = defaultdict(lambda: {'correct': 0, 'total': 0})
-        for item in self.words.values():
-            if item.review_count > 0:
-                interval = item.interval
-                interval_groups[interval]['correct'] += item.correct_count
-                interval_groups[interval]['total'] += item.review_count
-        
-        retention_rates = {}
-        for interval, counts in sorted(interval_groups.items()):
-            if counts['total'] > 0:
-                rate = counts['correct'] / counts['total'] * 100
-                retention_rates[interval] = round(rate, 2)
-        return retention_rates
-    
-    def _get_daily_progress(self, days: int = 30) -> List[Dict]:
-        daily_data = defaultdict(lambda: {'words': 0, 'correct': 0, 'total': 0})
-        for word_item in self.words.values():
-            if word_item.last_review:
-                date = datetime.fromisoformat(word_item.last_review).date()
-                daily_data[date.isoformat()]['words'] += 1
-        
-        progress_list = []
-        today = datetime.now().date()
-        for i in range(days):
-            date = today - timedelta(days=i)
-            date_str = date.isoformat()
-            data = daily_data.get(date_str, {'words': 0, 'correct': 0, 'total': 0})
-            accuracy = (data['correct'] / data['total'] * 100) if data['total'] > 0 else 0
-            progress_list.append({
-                'date': date_str,
-                'words': data['words'],
-                'correct': data['correct'],
-                'total': data['total'],
-                'accuracy': accuracy
-            })
-        return sorted(progress_list, key=lambda x: x['date'])
+        return self.columns.retention_rates()
+    
+    def get_daily_progress(self, days: int = 30) -> List[Dict]:
+        """最近 days 天每天的复习数 (words/total)、答对数、正确率和用时, 来自复习时间序列"""
+        with self.lock:
+            series = self.timeseries.daily_series(days)
+        return [{'date': day['date'], 'words': day['reviews'], 'correct': day['correct'], 'total': day['reviews'],
+                 'accuracy': day['accuracy'], 'minutes': day['minutes']} for day in series]
     
     def get_word_by_id(self, word_id: str) -> Optional[WordItem]:
         return self.word_id_index.get(word_id)
@@ -466,7 +819,8 @@ class DataManager:
         for key, value in kwargs.items():
             if hasattr(item, key):
                 setattr(item, key, value)
-        item.updated_at = datetime.now().isoformat()
+        item.touch()
+        self.mark_dirty(item)
         return True
     
     def add_custom_word(self, word: str, meaning: str, **kwargs) -> bool:
@@ -475,13 +829,40 @@ class DataManager:
         word_item = WordItem(word=word, meaning=meaning, **kwargs)
         self.words[word] = word_item
         self.word_id_index[word_item.word_id] = word_item
+        self.mark_dirty(word_item)
         return True
 
 class MemorizerCore:
-    def __init__(self, data_dir: str = "data", review_params: ReviewParameters = None):
-        self.data_manager = DataManager(data_dir)
-        self.review_params = review_params or ReviewParameters()
+    # 每次取卡最多从到期日历补充的单词数, 保证 get_next_review_item 的耗时有上界
+    refill_batch = 10
+    # 由取卡到答题推算用时的上限 (秒), 离开后回来答题不计入过长的用时
+    max_answer_seconds = 300
+    
+    def __init__(self, data_dir: str = "data", review_params: ReviewParameters = None,
+                 storage: Any = "json", flush_interval: float = 2.0, flush_threshold: int = 50,
+                 lazy: bool = False):
+        self.data_manager = DataManager(data_dir, storage=storage, lazy=lazy)
+        # 答题后的写盘交给后台线程, flush_interval 秒内无新修改或积累 flush_threshold 个修改时写入
+        self.persistence = PersistenceWorker(self.data_manager, flush_interval, flush_threshold)
+        self.data_manager.on_dirty = self.persistence.notify
+        # 没有指定参数时使用优化后保存的参数
+        self.review_params = review_params or self.data_manager.load_review_params() or ReviewParameters()
         self.scheduler = ReviewScheduler(self.review_params)
+        self.scheduler.on_item_updated = self.data_manager.mark_dirty
+        self.scheduler.item_lookup = self.data_manager.get_word_by_id
+        self.scheduler.columns = self.data_manager.columns
+        # 完整的复习历史只追加到磁盘上的事件日志, 内存中只保留最近的事件
+        self.scheduler.event_log = EventLog(self.data_manager.data_dir / "events.log")
+        self.data_manager.event_log = self.scheduler.event_log
+        # 时间序列上次保存之后写入日志的事件 (如崩溃前的) 在这里补上
+        timeseries, event_log = self.data_manager.timeseries, self.scheduler.event_log
+        if len(event_log) > timeseries.events_folded:
+            timeseries.fold(event_log.iter_events(start=timeseries.events_folded))
+        # word_id -> 取卡时间, 用于推算答题用时
+        self._served_at: Dict[str, float] = {}
+        # 会话只复习满足这个标签查询的单词 (None 为不限), _tag_query 为解析后的查询树
+        self.tag_filter: Optional[str] = None
+        self._tag_query = None
         self.current_session = {
             'session_id': str(uuid.uuid4()),
             'start_time': datetime.now().isoformat(),
@@ -495,7 +876,9 @@ class MemorizerCore:
             'new_words_per_day': 20,
             'review_limit': 100,
             'shuffle_method': 'random',
-            'difficulty_weight': 1.0
+            'difficulty_weight': 1.0,
+            # 答错的单词在之后第 3 张卡片时再出现, 答对后再隔 8 张出现一次
+            'relearn_steps': [3, 8]
         }
     
     def initialize(self) -> bool:
@@ -507,47 +890,234 @@ class MemorizerCore:
         return True
     
     def _initialize_review_queues(self):
+        """从头构建会话队列和到期日历; 之后的单词变化走 enqueue_words / _rerank_queue 增量更新"""
         self.scheduler.words_queue.clear()
-        self.scheduler.review_heap = []
-        current_time = datetime.now()
-        due_items = []
+        self.scheduler.reset_session()
+        columns = self.data_manager.columns
+        current_time = datetime.now().timestamp()
+        
+        # 排序只用列式状态, 之后只加载队列里的 review_limit 个单词 (延迟加载模式下也只构建这些)
+        # 只选出前 review_limit 个 (argpartition), 不对全部到期单词排序
+        if self._tag_query is None:
+            due_rows, upcoming_rows = columns.split_due(current_time)
+        else:
+            # 有标签限制时只处理倒排索引查出的单词
+            rows = np.sort(columns.rows(self.data_manager.query_tags(self._tag_query)))
+            due_rows, upcoming_rows = columns.split_due(current_time, rows)
+        selected, overflow = columns.select(due_rows, self.user_preferences['review_limit'], self._queue_method(),
+                                            self.user_preferences['difficulty_weight'], now=current_time)
+        due_items = [self.data_manager.get_word_by_id(word_id) for word_id in columns.ids(selected)]
+        self.scheduler.words_queue = deque(item for item in due_items if item is not None)
+        
+        # 没进入队列的单词 (包括超出 review_limit 的到期单词) 都放进到期日历
+        rest = np.concatenate([overflow, upcoming_rows])
+        self.scheduler.due_calendar = DueCalendar.from_arrays(
+            columns.ids(rest), columns['next_review'][rest], current_time)
+    
+    def set_tag_filter(self, expression: Optional[str] = None):
+        """只复习满足标签查询 (如 "cet6 AND NOT verb") 的单词, None 取消限制; 重建会话队列。
+        查询有语法错误时抛出 ValueError, 当前会话不变"""
+        query = parse_query(expression) if expression else None
+        self.tag_filter, self._tag_query = expression or None, query
+        self._initialize_review_queues()
+    
+    def _in_filter(self, word_id: str) -> bool:
+        if self._tag_query is None:
+            return True
+        return matches(self._tag_query, self.data_manager.tag_index.tags_of.get(word_id, ()))
+    
+    def _queueable(self, word_id: str) -> bool:
+        """能否从到期日历进入队列: 重学中的单词由重学队列负责; 批量答题等放进日历的单词可能不满足标签限制"""
+        return word_id not in self.scheduler.relearn_step and self._in_filter(word_id)
+    
+    def _queue_method(self) -> str:
+        method = self.user_preferences['shuffle_method']
+        return method if method in ORDERINGS else 'random'
+    
+    def _queue_key(self):
+        """当前排序方式下单个单词的排序键 (与 DeckColumns.priority 相同), 随机顺序返回 None"""
+        method = self._queue_method()
+        if method not in ORDERINGS:
+            return None
+        weight = self.user_preferences['difficulty_weight']
+        now = datetime.now().timestamp()
+        return lambda item: item_priority(item, method, weight, now)
+    
+    def _insert_into_queue(self, items: List[WordItem]):
+        """按当前排序方式把单词插入队列中的位置, 不移动已有的单词"""
+        queue = self.scheduler.words_queue
+        key = self._queue_key()
+        if key is None:
+            for item in items:
+                queue.insert(random.randint(0, len(queue)), item)
+            return
+        keys = [key(item) for item in queue]
+        for item in items:
+            # 相同键排在已有单词之后, 与稳定排序一致
+            index = bisect.bisect_right(keys, key(item))
+            keys.insert(index, key(item))
+            queue.insert(index, item)
+    
+    def enqueue_words(self, word_ids: Iterable[str]):
+        """增量处理新增或修改过的单词: 到期的补进队列的空位 (不超过 review_limit), 其余放进到期日历。
+        已在队列中的单词保留, 只按新的排序键重新定位; 代价只与 word_ids 的数量有关"""
+        queue = self.scheduler.words_queue
+        calendar = self.scheduler.due_calendar
+        current_time = datetime.now().timestamp()
+        word_ids = set(word_ids)
+        key = self._queue_key()
         
-        for word in self.data_manager.words.values():
-            next_review = datetime.fromisoformat(word.next_review)
-            if next_review <= current_time:
-                due_items.append(word)
+        if self._tag_query is not None:
+            # 修改后不再满足标签限制的单词移出本次会话
+            excluded = {word_id for word_id in word_ids if not self._in_filter(word_id)}
+            if excluded:
+                kept = [item for item in queue if item.word_id not in excluded]
+                queue.clear()
+                queue.extend(kept)
+                for word_id in excluded:
+                    calendar.remove(word_id)
+                word_ids -= excluded
+        
+        requeued = [item for item in queue if item.word_id in word_ids]
+        requeued_ids = {item.word_id for item in requeued}
+        word_ids -= requeued_ids
+        if key is None:
+            # 随机顺序下已在队列里的单词原地不动
+            requeued = []
+        elif requeued:
+            kept = [item for item in queue if item.word_id not in requeued_ids]
+            queue.clear()
+            queue.extend(kept)
+        
+        candidates = []
+        for word_id in word_ids:
+            calendar.remove(word_id)
+            item = self.data_manager.get_word_by_id(word_id)
+            if item is None:
+                continue
+            if item.next_review_ts <= current_time:
+                candidates.append(item)
             else:
-                heapq.heappush(self.scheduler.review_heap, (next_review.timestamp(), word))
+                calendar.push(word_id, item.next_review_ts)
         
-        if self.user_preferences['shuffle_method'] == 'difficulty':
-            due_items.sort(key=lambda x: x.difficulty * self.user_preferences['difficulty_weight'], reverse=True)
-        elif self.user_preferences['shuffle_method'] == 'performance':
-            due_items.sort(key=lambda x: x.correct_count / x.review_count if x.review_count > 0 else 0)
+        if key is None:
+            random.shuffle(candidates)
         else:
-            random.shuffle(due_items)
-        
-        due_items = due_items[:self.user_preferences['review_limit']]
-        self.scheduler.words_queue = deque(due_items)
+            candidates.sort(key=key)
+        capacity = max(0, self._queue_capacity() - len(requeued))
+        self._insert_into_queue(requeued + candidates[:capacity])
+        for item in candidates[capacity:]:
+            calendar.push(item.word_id, item.next_review_ts)
+    
+    def _rerank_queue(self, reorder: bool = True):
+        """偏好改变后按新的 review_limit (减去本次会话已取出的卡片) 截断队列或从到期日历补充;
+        reorder=True 时先按新的排序方式就地重排, 否则已在队列中的单词保持原有顺序"""
+        limit = max(0, self.user_preferences['review_limit'] - self.scheduler.queue_served)
+        if reorder:
+            self.scheduler.shuffle_queue(self._queue_method(), self.user_preferences['difficulty_weight'])
+        queue = self.scheduler.words_queue
+        while len(queue) > limit:
+            item = queue.pop()
+            self.scheduler.due_calendar.push(item.word_id, item.next_review_ts)
+        if len(queue) < limit:
+            self._insert_into_queue(self.scheduler.get_due_items(limit - len(queue), self._queueable))
+    
+    def _queue_capacity(self) -> int:
+        """队列还能放进的单词数: 本次会话已从队列取出的卡片也计入 review_limit"""
+        return max(0, self.user_preferences['review_limit'] - self.scheduler.queue_served
+                   - len(self.scheduler.words_queue))
+    
+    def _refill_queue(self):
+        """从到期日历补充会话中新到期的单词, 每次最多 refill_batch 个"""
+        capacity = min(self.refill_batch, self._queue_capacity())
+        if capacity <= 0:
+            return
+        self._insert_into_queue(self.scheduler.get_due_items(capacity, self._queueable))
     
     # 修复：添加 *args 和 **kwargs 以兼容不同调用方式
     def get_next_review_item(self, *args, **kwargs) -> Optional[WordItem]:
-        if self.scheduler.words_queue:
-            item = self.scheduler.words_queue.popleft()
-            self.current_session['words'].append(item.word_id)
-            return item
-        return None
-    
-    def submit_answer(self, item: WordItem, is_correct: bool, quality: int = None):
-        self.scheduler.update_item_after_review(item, is_correct, quality)
+        scheduler = self.scheduler
+        word_id = scheduler.next_relearning()
+        item = self.data_manager.get_word_by_id(word_id) if word_id else None
+        if item is None:
+            self._refill_queue()
+            if scheduler.words_queue:
+                item = scheduler.words_queue.popleft()
+                scheduler.queue_served += 1
+            else:
+                word_id = scheduler.next_relearning(force=True)
+                item = self.data_manager.get_word_by_id(word_id) if word_id else None
+        if item is None:
+            return None
+        scheduler.cards_served += 1
+        self.current_session['words'].append(item.word_id)
+        self._served_at[item.word_id] = datetime.now().timestamp()
+        return item
+    
+    def submit_answer(self, item: WordItem, is_correct: bool, quality: int = None, seconds: float = None):
+        """seconds 为答题用时, 默认为距取到这张卡片的时间 (不超过 max_answer_seconds)"""
+        served_at = self._served_at.pop(item.word_id, None)
+        if seconds is None:
+            seconds = min(datetime.now().timestamp() - served_at, self.max_answer_seconds) if served_at else 0.0
+        with self.data_manager.lock:
+            self.scheduler.update_item_after_review(item, is_correct, quality)
+            self.data_manager.record_review(item.last_review_ts, is_correct, seconds)
+        self.scheduler.schedule_relearning(item, is_correct, self.user_preferences['relearn_steps'])
         self.current_session['total_answers'] += 1
         if is_correct:
             self.current_session['correct_answers'] += 1
         self.current_session['words_reviewed'] += 1
-        self.data_manager.save_progress()
+    
+    def submit_answers(self, batch: Iterable[Tuple]) -> int:
+        """批量提交答题: batch 中每项为 (word_id, correct, quality, timestamp)。
+        按 timestamp (epoch 秒 / datetime / ISO 字符串, None 为现在) 的先后顺序应用 SM-2 更新,
+        结束后只写一次盘、更新一次会话统计; 返回实际应用的答题数"""
+        reviews = []
+        for word_id, is_correct, quality, timestamp in batch:
+            review_time = _to_timestamp(timestamp)
+            reviews.append((datetime.now().timestamp() if review_time is None else review_time,
+                            word_id, bool(is_correct), quality))
+        # 同一个单词的多次答题必须按时间先后计算
+        reviews.sort(key=lambda review: review[0])
+        
+        updated: Dict[str, WordItem] = {}
+        correct = skipped = 0
+        with self.data_manager.lock:
+            for review_time, word_id, is_correct, quality in reviews:
+                item = self.data_manager.get_word_by_id(word_id)
+                if item is None:
+                    skipped += 1
+                    continue
+                self.scheduler.update_item_after_review(item, is_correct, quality, review_time, notify=False)
+                self.data_manager.record_review(review_time, is_correct)
+                updated[word_id] = item
+                correct += is_correct
+            for item in updated.values():
+                self.data_manager.mark_dirty(item, notify=False)
+            # 答过的单词已按新的 next_review 放进到期日历, 从当前队列中移除以免重复出现
+            queue = self.scheduler.words_queue
+            if any(item.word_id in updated for item in queue):
+                kept = [item for item in queue if item.word_id not in updated]
+                queue.clear()
+                queue.extend(kept)
+        
+        applied = len(reviews) - skipped
+        self.current_session['total_answers'] += applied
+        self.current_session['correct_answers'] += correct
+        self.current_session['words_reviewed'] += applied
+        if skipped:
+            logger.warning(f"批量答题中有 {skipped} 条的单词不存在, 已跳过")
+        self.persistence.flush()
+        logger.info(f"批量提交 {applied} 条答题, 涉及 {len(updated)} 个单词")
+        return applied
     
     def end_session(self):
         self.current_session['end_time'] = datetime.now().isoformat()
         self.scheduler.clear_history()
+        if self.data_manager.storage.journaled:
+            # SQLite 的完整快照是整表删除再插入, 那里只写入修改过的行
+            self.persistence.request_snapshot()
+        self.persistence.flush()
     
     def get_session_stats(self) -> Dict:
         if self.current_session['end_time']:
@@ -568,42 +1138,141 @@ class MemorizerCore:
             'words_reviewed': self.current_session['words_reviewed'],
             'total_answers': self.current_session['total_answers'],
             'accuracy': round(accuracy, 2),
-            'remaining_words': len(self.scheduler.words_queue)
+            'remaining_words': len(self.scheduler.words_queue) + len(self.scheduler.relearn_queue)
         }
     
     def get_overall_stats(self) -> Dict:
         return self.data_manager.get_statistics()
     
+    def get_review_series(self, days: int = 30, hours: int = 24) -> Dict[str, List[Dict]]:
+        """最近 days 天和最近 hours 小时的复习数、答对数、正确率和用时 (分钟)"""
+        timeseries = self.data_manager.timeseries
+        with self.data_manager.lock:
+            return {'daily': timeseries.daily_series(days), 'hourly': timeseries.hourly_series(hours)}
+    
+    def simulate_parameters(self, history: Optional[Iterable[Tuple[str, int]]] = None,
+                            **overrides) -> Dict[str, Any]:
+        """假设模拟: 用改动后的调度参数 (如 interval_modifier=0.8) 从新卡片开始重放复习历史, 不修改任何单词。
+        history 为按时间排序的 (word_id, quality), 默认为完整的复习历史; 返回历史中出现的单词的模拟结果"""
+        params = replace(self.scheduler.params, **overrides)
+        if history is None:
+            events = sorted(self.scheduler.iter_review_history(), key=lambda event: event['timestamp'])
+            history = [(event['word_id'], event['quality']) for event in events]
+        row_of = self.data_manager.columns.row_of
+        history = [(row_of[word_id], quality) for word_id, quality in history if word_id in row_of]
+        rows = np.fromiter((row for row, _ in history), dtype=np.int64, count=len(history))
+        quality = np.fromiter((quality for _, quality in history), dtype=np.int64, count=len(history))
+        interval, easiness, consecutive, event_intervals = sm2.replay(
+            rows, quality, len(self.data_manager.columns), params)
+        reviewed = np.unique(rows)
+        return {
+            'word_ids': self.data_manager.columns.ids(reviewed),
+            'interval': interval[reviewed],
+            'easiness_factor': easiness[reviewed],
+            'consecutive_correct': consecutive[reviewed],
+            'event_intervals': event_intervals,
+            'avg_interval': round(float(interval[reviewed].mean()), 2) if len(reviewed) else 0.0
+        }
+    
+    def forecast_workload(self, days: int = 7, trials: int = 200, seconds_per_review: float = 8.0,
+                          include_new: bool = True, daily_limit: Optional[int] = None,
+                          workers: Optional[int] = None, seed: Optional[int] = None) -> Dict[str, Any]:
+        """预测未来 days 天每天的复习数和学习时间 (蒙特卡洛, 多进程并行)。
+        include_new 时按 new_words_per_day 每天开始一批新词; daily_limit 为每天最多复习的单词数 (默认不限)"""
+        now = datetime.now().timestamp()
+        new_per_day = self.user_preferences['new_words_per_day'] if include_new else 0
+        # 锁内只取出模拟用的数组副本, 蒙特卡洛模拟期间答题和保存不被阻塞
+        with self.data_manager.lock:
+            state = prepare_state(self.data_manager.columns, now, days, new_per_day)
+        return simulate(state, self.scheduler.params, days, trials, seconds_per_review,
+                        daily_limit=daily_limit, workers=workers, seed=seed, now=now)
+    
+    def optimize_review_params(self, history: Optional[Iterable[Tuple[str, Any, bool, int]]] = None,
+                               samples: int = 20000, min_retention: float = 0.85, workers: Optional[int] = None,
+                               seed: Optional[int] = None, apply: bool = True) -> Tuple[ReviewParameters, Dict]:
+        """用复习记录离线优化调度参数 (见 logic/optimizer.py), 返回 (参数, 报告)。
+        history 为 (word_id, 时间, 是否答对, 质量评分), 默认为完整的复习历史;
+        apply 时立即生效并保存到 review_params.json"""
+        if history is None:
+            history = [(event['word_id'], event['timestamp'], event['correct'], event['quality'])
+                       for event in self.scheduler.iter_review_history()]
+        events = [(word_id, _to_timestamp(timestamp), is_correct, quality)
+                  for word_id, timestamp, is_correct, quality in history]
+        params, report = optimize(events, self.scheduler.params, samples, min_retention,
+                                  workers=workers, seed=seed)
+        logger.info(f"调度参数优化完成: 保持率 {report['best']['retention']:.1%}, "
+                    f"得分 {report['baseline']['score']:.2f} -> {report['best']['score']:.2f}")
+        if apply:
+            self.review_params = params
+            self.scheduler.params = params
+            self.data_manager.save_review_params(params)
+        return params, report
+    
+    def get_forgetting_curves(self, by_tag: bool = True) -> Dict[str, Any]:
+        """由完整的复习事件日志统计距上次复习的天数与回忆率的关系 (全部/按难度/按标签),
+        并拟合每条曲线的遗忘速率和半衰期 (见 logic/analytics.py); 难度和标签取单词当前的值"""
+        event_log = self.scheduler.event_log
+        events = event_log.array()
+        # 单词表只会增长, 快照之后新增的单词不在 events 里
+        words = len(event_log.word_ids)
+        data_manager = self.data_manager
+        with data_manager.lock:
+            columns = data_manager.columns
+            rows = np.fromiter((columns.row_of.get(word_id, -1) for word_id in event_log.word_ids[:words]),
+                               dtype=np.int64, count=words)
+            difficulty = np.zeros(words, dtype=np.int64)
+            difficulty[rows >= 0] = columns['difficulty'][rows[rows >= 0]]
+            tags = None
+            if by_tag:
+                data_manager._load_tags()
+                index_of = event_log.index_of
+                tags = {tag: [index_of[word_id] for word_id in word_ids if index_of.get(word_id, words) < words]
+                        for tag, word_ids in data_manager.tag_index.words.items()}
+        return forgetting_curves(events, words, difficulty, tags)
+    
+    def restore_backup(self, timestamp: Optional[datetime] = None) -> bool:
+        """恢复到某个时间点的备份; 先写入未保存的修改, 避免它们在恢复后覆盖备份中的数据"""
+        self.persistence.flush()
+        if not self.data_manager.restore_backup(timestamp):
+            return False
+        self._initialize_review_queues()
+        return True
+    
     def import_custom_wordbook(self, file_path: str, file_type: str, source: str = "user") -> bool:
         try:
             if file_type.lower() == 'csv':
-                count = self.data_manager.load_words_from_csv(file_path, source)
+                with self.data_manager.lock:
+                    count = self.data_manager.load_words_from_csv(file_path, source)
             else:
                 logger.error(f"不支持的文件类型: {file_type}")
                 return False
             
-            if count > 0:
-                self._initialize_review_queues()
-                self.data_manager.save_progress()
-                return True
-            return False
+            # 只更新了已有单词时 count 为 0, 但队列位置仍可能变化
+            self.enqueue_words(self.data_manager.last_import_ids)
+            return count > 0
         except Exception as e:
             logger.error(f"导入词书失败: {e}")
             return False
     
     def add_custom_word(self, word: str, meaning: str, **kwargs) -> bool:
-        success = self.data_manager.add_custom_word(word, meaning, **kwargs)
+        with self.data_manager.lock:
+            success = self.data_manager.add_custom_word(word, meaning, **kwargs)
         if success:
-            self._initialize_review_queues()
-            self.data_manager.save_progress()
+            self.enqueue_words([self.data_manager.words[word].word_id])
         return success
     
     def update_user_preferences(self, **prefs):
-        valid_keys = ['new_words_per_day', 'review_limit', 'shuffle_method', 'difficulty_weight']
+        valid_keys = ['new_words_per_day', 'review_limit', 'shuffle_method', 'difficulty_weight', 'relearn_steps']
+        changed = set()
         for key, value in prefs.items():
-            if key in valid_keys:
+            if key in valid_keys and self.user_preferences[key] != value:
                 self.user_preferences[key] = value
-        self._initialize_review_queues()
+                changed.add(key)
+        # 只有排序方式 (及难度排序下的权重) 改变时才重排; review_limit 只截断或补充队列
+        reorder = 'shuffle_method' in changed or (
+            'difficulty_weight' in changed and self._queue_method() == 'difficulty')
+        if reorder or 'review_limit' in changed:
+            self._rerank_queue(reorder)
 
 if __name__ == "__main__":
     print("=== 单词记忆系统增强版测试 ===")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Due Calendar for Word Memorizer
+到期日历 - 分层时间轮: 未来一年按天分桶, 更远的按 30 天分桶, 游标前进时再逐层下放
+
+    ready   | 今天及以前到期的单词, 放在以 word_id 为键的索引优先队列里, 按时间顺序出队
+    ring    | 今天之后约一年内的单词, 环形数组, 每天一个集合
+    coarse  | 更远的单词, 每 30 天一个集合; 整个块进入一年的范围内时下放到 ring
+
+改期只是在集合之间移动 (O(1)); 查询 "现在/接下来一小时到期" 只访问该时间范围内的桶。
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from logic.priority_queue import IndexedPriorityQueue
+
+DAY = 86400.0
+# 天桶环的长度和粗粒度块的宽度 (天)
+RING_DAYS = 366
+BLOCK_DAYS = 30
+
+
+def _day(timestamp: float) -> int:
+    return int(timestamp // DAY)
+
+
+class DueCalendar:
+    """接口与 IndexedPriorityQueue 一致 (push/remove/pop_until/priority), 键为 word_id, 优先级为 next_review 时间戳"""
+
+    def __init__(self, entries: Iterable[Tuple[float, Hashable]] = (), now: Optional[float] = None):
+        now = self._now() if now is None else now
+        self._cursor = _day(now)
+        # 编号小于 _cascaded 的粗粒度块都已下放到 ring
+        self._cascaded = (self._cursor + RING_DAYS) // BLOCK_DAYS
+        self._ready = IndexedPriorityQueue()
+        self._ring: List[Set[Hashable]] = [set() for _ in range(RING_DAYS)]
+        self._coarse: Dict[int, Set[Hashable]] = {}
+        self._ts: Dict[Hashable, float] = {}
+        # 不在 ready 中的单词所在的天 / 块
+        self._slot: Dict[Hashable, int] = {}
+        self._block: Dict[Hashable, int] = {}
+        for timestamp, key in entries:
+            self.push(key, timestamp)
+
+    @classmethod
+    def from_arrays(cls, keys: List[Hashable], timestamps: np.ndarray, now: Optional[float] = None) -> "DueCalendar":
+        """从列式状态批量构建, 分桶在 NumPy 上完成 (键不能重复)"""
+        calendar = cls(now=now)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        keys = np.asarray(keys, dtype=object)
+        days = np.floor(timestamps / DAY).astype(np.int64)
+        blocks = days // BLOCK_DAYS
+        ready = days <= calendar._cursor
+        in_ring = ~ready & (blocks < calendar._cascaded)
+        in_coarse = ~ready & ~in_ring
+
+        calendar._ts = dict(zip(keys.tolist(), timestamps.tolist()))
+        calendar._ready = IndexedPriorityQueue(zip(timestamps[ready].tolist(), keys[ready].tolist()))
+        for mask, buckets, location, index_of in (
+                (in_ring, None, calendar._slot, days),
+                (in_coarse, calendar._coarse, calendar._block, blocks)):
+            bucket_keys, bucket_index = keys[mask], index_of[mask]
+            order = np.argsort(bucket_index, kind='stable')
+            bucket_keys, bucket_index = bucket_keys[order], bucket_index[order]
+            values, starts = np.unique(bucket_index, return_index=True)
+            for value, group in zip(values.tolist(), np.split(bucket_keys, starts[1:]) if len(values) else ()):
+                if buckets is None:
+                    calendar._ring[value % RING_DAYS] = set(group.tolist())
+                else:
+                    buckets[value] = set(group.tolist())
+            location.update(zip(bucket_keys.tolist(), bucket_index.tolist()))
+        return calendar
+
+    @staticmethod
+    def _now() -> float:
+        return datetime.now().timestamp()
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def __bool__(self) -> bool:
+        return bool(self._ts)
+
+    def __contains__(self, key) -> bool:
+        return key in self._ts
+
+    def __iter__(self):
+        """(时间戳, 键), 无序"""
+        return ((timestamp, key) for key, timestamp in self._ts.items())
+
+    def priority(self, key) -> Optional[float]:
+        return self._ts.get(key)
+
+    def _place(self, key, timestamp: float):
+        day = _day(timestamp)
+        if day <= self._cursor:
+            self._ready.push(key, timestamp)
+            return
+        block = day // BLOCK_DAYS
+        if block < self._cascaded:
+            self._ring[day % RING_DAYS].add(key)
+            self._slot[key] = day
+        else:
+            self._coarse.setdefault(block, set()).add(key)
+            self._block[key] = block
+
+    def push(self, key, timestamp: float):
+        """加入或改期"""
+        if key in self._ts:
+            self._unplace(key)
+        self._ts[key] = timestamp
+        self._place(key, timestamp)
+
+    def _unplace(self, key):
+        day = self._slot.pop(key, None)
+        if day is not None:
+            self._ring[day % RING_DAYS].discard(key)
+            return
+        block = self._block.pop(key, None)
+        if block is not None:
+            bucket = self._coarse[block]
+            bucket.discard(key)
+            if not bucket:
+                del self._coarse[block]
+            return
+        self._ready.remove(key)
+
+    def remove(self, key) -> bool:
+        if key not in self._ts:
+            return False
+        self._unplace(key)
+        del self._ts[key]
+        return True
+
+    def advance(self, now: float):
+        """游标移到 now 所在的天: 经过的天桶并入 ready, 进入一年范围的粗粒度块下放到天桶"""
+        today = _day(now)
+        if today <= self._cursor:
+            return
+        for day in range(self._cursor + 1, min(today, self._cursor + RING_DAYS) + 1):
+            bucket = self._ring[day % RING_DAYS]
+            for key in bucket:
+                del self._slot[key]
+                self._ready.push(key, self._ts[key])
+            bucket.clear()
+        self._cursor = today
+        cascaded, self._cascaded = self._cascaded, (today + RING_DAYS) // BLOCK_DAYS
+        for block in range(cascaded, self._cascaded):
+            for key in self._coarse.pop(block, ()):
+                del self._block[key]
+                self._place(key, self._ts[key])
+
+    def pop_until(self, timestamp: float, limit: Optional[int] = None,
+                  accept: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[float, Hashable]]:
+        """按时间顺序取出 timestamp 之前到期的单词, 最多 limit 个; accept 返回 False 的单词留在日历中"""
+        self.advance(timestamp)
+        if accept is None:
+            popped = self._ready.pop_until(timestamp, limit)
+        else:
+            popped, skipped = [], []
+            while limit is None or len(popped) < limit:
+                entry = self._ready.pop_until(timestamp, 1)
+                if not entry:
+                    break
+                (popped if accept(entry[0][1]) else skipped).append(entry[0])
+            for ts, key in skipped:
+                self._ready.push(key, ts)
+        for _, key in popped:
+            del self._ts[key]
+        return popped
+
+    def due_until(self, timestamp: float, now: Optional[float] = None) -> List[Tuple[float, Hashable]]:
+        """不出队, 列出 timestamp 之前到期的单词 (按时间排序), 如 "接下来一小时"; 只访问范围内的桶"""
+        self.advance(self._now() if now is None else now)
+        due = [(ts, key) for ts, key in self._ready if ts <= timestamp]
+        last_day = _day(timestamp)
+        for day in range(self._cursor + 1, min(last_day, self._cursor + RING_DAYS) + 1):
+            due.extend((self._ts[key], key) for key in self._ring[day % RING_DAYS]
+                       if self._ts[key] <= timestamp)
+        for block in range(self._cascaded, last_day // BLOCK_DAYS + 1):
+            due.extend((self._ts[key], key) for key in self._coarse.get(block, ())
+                       if self._ts[key] <= timestamp)
+        return sorted(due, key=lambda entry: entry[0])
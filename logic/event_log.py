@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Review Event Log for Word Memorizer
+复习事件日志 - 每次复习一条定长二进制记录, 只追加; 单词另存一张表, 记录里只放它的序号
+
+文件:
+    events.log    | magic + 版本, 之后每条 40 字节: 时间戳, 单词序号, 质量评分, 是否答对, 复习后的连续答对数,
+                  | 复习前/后的间隔, 复习前/后的 EF
+    events.words  | 单词表, 每行 "word_id<TAB>word", 行号即单词序号
+
+写入先进入内存缓冲, 每 flush_every 条或 flush() 时落盘; 单词表总是先于引用它的记录写入。
+末尾写了一半的记录 (崩溃时) 在读取时被忽略, 重新打开时被截掉。
+"""
+
+import logging
+import os
+import struct
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'WMEVLG01'
+HEADER = struct.Struct('<8sI')
+VERSION = 1
+# timestamp, word_index, quality, correct, consecutive, old_interval, interval, old_ef, easiness
+RECORD = struct.Struct('<dIBBHiidd')
+# 与 RECORD 布局相同, 用于 NumPy 批量读取
+DTYPE = np.dtype([('timestamp', '<f8'), ('word_index', '<u4'), ('quality', 'u1'), ('correct', 'u1'),
+                  ('consecutive', '<u2'), ('old_interval', '<i4'), ('interval', '<i4'),
+                  ('old_ef', '<f8'), ('easiness', '<f8')])
+
+
+class EventLog:
+    """只追加的复习事件日志; append 的参数和 iter_events 的结果都是复习事件 dict"""
+
+    def __init__(self, path: Path, flush_every: int = 64):
+        self.path = Path(path)
+        self.words_path = self.path.with_suffix('.words')
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.word_ids: List[str] = []
+        self.words: List[str] = []
+        self.index_of: Dict[str, int] = {}
+        self._pending = bytearray()
+        self._pending_count = 0
+        self._pending_words: List[int] = []
+        self._open()
+
+    def _open(self):
+        if self.words_path.exists():
+            with open(self.words_path, 'r', encoding='utf-8', newline='\n') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break
+                    word_id, _, word = line[:-1].partition('\t')
+                    self.index_of[word_id] = len(self.word_ids)
+                    self.word_ids.append(word_id)
+                    self.words.append(word)
+        if not self.path.exists() or self.path.stat().st_size < HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION))
+            self.count = 0
+            return
+        with open(self.path, 'rb') as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的复习事件日志: {self.path}")
+        size = self.path.stat().st_size - HEADER.size
+        self.count = size // RECORD.size
+        if size % RECORD.size:
+            logger.warning("复习事件日志末尾有不完整的记录, 已截掉")
+            with open(self.path, 'r+b') as f:
+                f.truncate(HEADER.size + self.count * RECORD.size)
+
+    def __len__(self) -> int:
+        return self.count + self._pending_count
+
+    def append(self, event: Dict):
+        with self.lock:
+            index = self.index_of.get(event['word_id'])
+            if index is None:
+                index = len(self.word_ids)
+                self.index_of[event['word_id']] = index
+                self.word_ids.append(event['word_id'])
+                self.words.append(event['word'])
+                self._pending_words.append(index)
+            self._pending += RECORD.pack(
+                datetime.fromisoformat(event['timestamp']).timestamp(), index, event['quality'],
+                event['correct'], min(event['consecutive'], 0xFFFF), event['old_interval'],
+                event['interval'], event['old_ef'], event['easiness'])
+            self._pending_count += 1
+            if self._pending_count >= self.flush_every:
+                self._flush()
+
+    def flush(self) -> bool:
+        """写入缓冲中的记录, 返回缓冲是否已全部落盘"""
+        with self.lock:
+            self._flush()
+            return not self._pending_count
+
+    def _flush(self):
+        if not self._pending_count:
+            return
+        try:
+            if self._pending_words:
+                with open(self.words_path, 'a', encoding='utf-8', newline='\n') as f:
+                    f.write(''.join(f"{self.word_ids[i]}\t{self.words[i]}\n" for i in self._pending_words))
+                self._pending_words = []
+            with open(self.path, 'ab') as f:
+                f.write(self._pending)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # 留在缓冲里, 下次再写
+            logger.error(f"写入复习事件日志失败: {e}")
+            return
+        self.count += self._pending_count
+        self._pending = bytearray()
+        self._pending_count = 0
+
+    def array(self) -> np.ndarray:
+        """全部记录的结构化数组 (字段见 DTYPE), 包括尚未落盘的; word_index 对应 word_ids"""
+        with self.lock:
+            pending = np.frombuffer(bytes(self._pending), dtype=DTYPE)
+            stored = np.fromfile(self.path, dtype=DTYPE, count=self.count, offset=HEADER.size) \
+                if self.count else np.empty(0, dtype=DTYPE)
+        return np.concatenate([stored, pending])
+
+    def _decode(self, record: tuple) -> Dict:
+        timestamp, index, quality, correct, consecutive, old_interval, interval, old_ef, easiness = record
+        return {
+            'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+            'word': self.words[index],
+            'word_id': self.word_ids[index],
+            'correct': bool(correct),
+            'quality': quality,
+            'next_review': (datetime.fromtimestamp(timestamp) + timedelta(days=interval)).isoformat(),
+            'interval': interval,
+            'easiness': easiness,
+            'old_interval': old_interval,
+            'old_ef': old_ef,
+            'consecutive': consecutive,
+        }
+
+    def iter_events(self, since: Optional[float] = None, start: int = 0, chunk: int = 4096) -> Iterator[Dict]:
+        """按写入顺序遍历事件 (since 为起始时间戳, start 为跳过的条数), 文件分块读取, 内存占用与日志长度无关"""
+        with self.lock:
+            count = self.count
+            pending = bytes(self._pending)
+        skipped = min(start, count)
+        pending = pending[(start - skipped) * RECORD.size:]
+        with open(self.path, 'rb') as f:
+            f.seek(HEADER.size + skipped * RECORD.size)
+            remaining = count - skipped
+            while remaining:
+                data = f.read(min(chunk, remaining) * RECORD.size)
+                if len(data) < RECORD.size:
+                    break
+                remaining -= len(data) // RECORD.size
+                for record in RECORD.iter_unpack(data):
+                    if since is None or record[0] >= since:
+                        yield self._decode(record)
+        for record in RECORD.iter_unpack(pending):
+            if since is None or record[0] >= since:
+                yield self._decode(record)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Review Workload Forecast for Word Memorizer
+复习量预测 - 从每个单词当前的调度状态出发做蒙特卡洛模拟, 估计未来 N 天每天的到期数和学习时间
+
+每次模拟逐天推进: 当天到期的单词按各自的回忆概率 (correct_count / review_count) 随机答对或答错,
+再用向量化 SM-2 (logic/sm2.py) 算出下次复习的日期。多次模拟分块交给进程池并行运行。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from logic import sm2
+
+DAY = 86400.0
+# 没有任何复习记录时使用的回忆概率
+DEFAULT_RECALL = 0.85
+
+
+def prepare_state(columns, now: float, days: int, new_per_day: int = 0) -> Tuple[np.ndarray, ...]:
+    """从列式状态取出模拟需要的数组: (interval, easiness, consecutive, 到期日序号, 回忆概率)。
+
+    到期日序号以今天为 0, 已过期的也算 0; 窗口内不会到期的单词不参与模拟。
+    没复习过的单词视为新词, 每天最多开始 new_per_day 个 (为 0 时不计入)。
+    """
+    reviews = columns['review_count']
+    reviewed = reviews > 0
+    recall = columns.accuracy(np.arange(len(columns)))
+    total = reviews[reviewed].sum()
+    mean_recall = columns['correct_count'][reviewed].sum() / total if total else DEFAULT_RECALL
+    recall[~reviewed] = mean_recall
+
+    today = datetime.combine(datetime.fromtimestamp(now).date(), datetime.min.time()).timestamp()
+    next_review = np.nan_to_num(columns['next_review'], nan=now)
+    due_day = np.maximum(np.floor((next_review - today) / DAY), 0).astype(np.int64)
+    new_rows = np.flatnonzero(~reviewed)
+    if new_per_day > 0:
+        # 新词按列中的顺序每天开始一批
+        due_day[new_rows] = np.arange(len(new_rows)) // new_per_day
+    else:
+        due_day[new_rows] = days
+
+    active = due_day < days
+    return (columns['interval'][active].copy(), columns['easiness_factor'][active].copy(),
+            columns['consecutive_correct'][active].copy(), due_day[active], recall[active])
+
+
+def run_trials(state: Tuple[np.ndarray, ...], params, days: int, trials: int,
+               seed, daily_limit: Optional[int] = None) -> np.ndarray:
+    """跑 trials 次模拟, 返回 (trials, days) 的每日复习数; daily_limit 为每天最多复习的单词数 (到期早的优先)"""
+    interval0, easiness0, consecutive0, due_day0, recall = state
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((trials, days), dtype=np.int64)
+    for trial in range(trials):
+        interval, easiness = interval0.copy(), easiness0.copy()
+        consecutive, due_day = consecutive0.copy(), due_day0.copy()
+        for day in range(days):
+            due = np.flatnonzero(due_day <= day)
+            if daily_limit is not None and len(due) > daily_limit:
+                due = due[np.argpartition(due_day[due], daily_limit - 1)[:daily_limit]]
+            if not len(due):
+                continue
+            correct = rng.random(len(due)) < recall[due]
+            quality = np.where(correct, params.perfect_score, params.min_quality)
+            new_interval, new_ef, new_consecutive = sm2.next_review(
+                interval[due], easiness[due], consecutive[due], quality, params)
+            interval[due], easiness[due], consecutive[due] = new_interval, new_ef, new_consecutive
+            # 间隔为 0 时当天内已复习过, 最早第二天再计
+            due_day[due] = day + np.maximum(new_interval, 1)
+            counts[trial, day] = len(due)
+    return counts
+
+
+def forecast(columns, params, days: int = 7, trials: int = 200, seconds_per_review: float = 8.0,
+             new_per_day: int = 0, daily_limit: Optional[int] = None, workers: Optional[int] = None,
+             seed: Optional[int] = None, now: Optional[float] = None) -> Dict:
+    """未来 days 天每天的预计复习数 (均值和 10%/90% 分位) 与学习分钟数; workers=1 时不启动子进程"""
+    now = datetime.now().timestamp() if now is None else now
+    return simulate(prepare_state(columns, now, days, new_per_day), params, days, trials, seconds_per_review,
+                    daily_limit, workers, seed, now)
+
+
+def simulate(state: Tuple[np.ndarray, ...], params, days: int, trials: int = 200, seconds_per_review: float = 8.0,
+             daily_limit: Optional[int] = None, workers: Optional[int] = None, seed: Optional[int] = None,
+             now: Optional[float] = None) -> Dict:
+    """在 prepare_state 取出的数组上运行 forecast 的模拟; 不再访问列式状态, 调用方不必持有锁"""
+    now = datetime.now().timestamp() if now is None else now
+    workers = workers or min(os.cpu_count() or 1, trials)
+    chunks = [len(chunk) for chunk in np.array_split(np.arange(trials), workers) if len(chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    if len(chunks) == 1:
+        counts = run_trials(state, params, days, trials, seeds[0], daily_limit)
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [pool.submit(run_trials, state, params, days, size, chunk_seed, daily_limit)
+                       for size, chunk_seed in zip(chunks, seeds)]
+            counts = np.vstack([future.result() for future in futures])
+
+    start = datetime.fromtimestamp(now).date()
+    mean = counts.mean(axis=0)
+    return {
+        'dates': [(start + timedelta(days=day)).isoformat() for day in range(days)],
+        # 不取整: 取整后的均值可能超出分位数, 显示时再格式化
+        'expected': mean.tolist(),
+        'p10': np.percentile(counts, 10, axis=0).tolist(),
+        'p90': np.percentile(counts, 90, axis=0).tolist(),
+        'minutes': np.round(mean * seconds_per_review / 60, 1).tolist(),
+        'trials': trials,
+        'words': len(state[0])
+    }
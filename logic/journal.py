@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Review Journal for Word Memorizer
+追加式复习日志 - 每次复习只追加一条记录，定期压缩为快照
+"""
+
+import json
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewJournal:
+    """Write-ahead 日志：每行一条 JSON 记录，追加后立即 fsync"""
+
+    def __init__(self, path: Path, fsync: bool = True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._file = None
+        self.entries = self._count_entries()
+
+    def _count_entries(self) -> int:
+        if not self.path.exists():
+            return 0
+        with open(self.path, 'rb') as f:
+            return sum(1 for line in f if line.strip())
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def append(self, record: Dict):
+        """追加一条记录，开销与词库大小无关"""
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict]):
+        """追加多条记录，只 fsync 一次"""
+        f = self._open()
+        f.write(''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                        for record in records))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        self.entries += len(records)
+
+    def replay(self) -> Iterator[Dict]:
+        """按写入顺序读出所有记录，末尾写了一半的记录会被忽略"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"复习日志第{line_num}行损坏，已跳过")
+
+    def truncate(self):
+        """快照写入成功后清空日志"""
+        self.close()
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+        self.entries = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return self.entries
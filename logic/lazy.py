@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Lazy Word Store for Word Memorizer
+延迟加载 - 常驻调度索引, 完整的 WordItem 在首次访问时才从存储后端构建
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from logic.columnar import item_values
+
+# word_id -> (word, next_review 时间戳, interval, easiness_factor, last_review 时间戳,
+#             review_count, correct_count, consecutive_correct, difficulty)
+ScheduleIndex = Dict[str, Tuple]
+
+
+class LazyWordStore:
+    """LRU 限制常驻 WordItem 数量; 被修改且尚未保存的单词会被固定, 不会被淘汰。
+    界面线程按需构建单词, 后台写盘线程解除固定, 常驻集合的读写都在 lock (DataManager.lock) 内"""
+
+    def __init__(self, index: ScheduleIndex, loader: Callable[[str], Dict],
+                 factory: Callable[..., object], capacity: int = 10000,
+                 lock: Optional[threading.RLock] = None):
+        self.lock = lock or threading.RLock()
+        self.index = index
+        self.word_ids = {entry[0]: word_id for word_id, entry in index.items()}
+        self.capacity = capacity
+        self._loader = loader
+        self._factory = factory
+        self._resident: "OrderedDict[str, object]" = OrderedDict()
+        self._pinned: Dict[str, object] = {}
+        self.hydrations = 0
+        self.by_id = _ByIdView(self)
+        self.by_word = _ByWordView(self)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def resident_count(self) -> int:
+        return len(self._resident) + len(self._pinned)
+
+    def get(self, word_id: str):
+        with self.lock:
+            item = self._pinned.get(word_id)
+            if item is not None:
+                return item
+            item = self._resident.get(word_id)
+            if item is not None:
+                self._resident.move_to_end(word_id)
+                return item
+            if word_id not in self.index:
+                return None
+            item = self._factory(**self._loader(word_id))
+            self.hydrations += 1
+            self._resident[word_id] = item
+            if len(self._resident) > self.capacity:
+                self._resident.popitem(last=False)
+            return item
+
+    def update_index(self, item):
+        with self.lock:
+            self.index[item.word_id] = (item.word,) + item_values(item)
+            self.word_ids[item.word] = item.word_id
+
+    def pin(self, item):
+        """固定一个已修改的单词, 同时把它作为该 word_id 的唯一实例"""
+        with self.lock:
+            self._resident.pop(item.word_id, None)
+            self._pinned[item.word_id] = item
+            self.update_index(item)
+
+    def release(self, word_ids):
+        """单词已写入存储后端, 解除固定, 重新交给 LRU 管理"""
+        with self.lock:
+            for word_id in word_ids:
+                item = self._pinned.pop(word_id, None)
+                if item is not None:
+                    self._resident[word_id] = item
+            while len(self._resident) > self.capacity:
+                self._resident.popitem(last=False)
+
+    def remove(self, word_id: str):
+        with self.lock:
+            word = self.index.pop(word_id)[0]
+            self.word_ids.pop(word, None)
+            self._resident.pop(word_id, None)
+            self._pinned.pop(word_id, None)
+
+    def record(self, word_id: str) -> Dict:
+        """单词的完整记录; 未常驻的单词直接返回存储中的记录, 不构建 WordItem"""
+        with self.lock:
+            item = self._pinned.get(word_id) or self._resident.get(word_id)
+            return item.to_dict() if item is not None else self._loader(word_id)
+
+    def pinned(self) -> List[object]:
+        """已修改但尚未保存的单词"""
+        with self.lock:
+            return list(self._pinned.values())
+
+    def records(self) -> Iterator[Tuple[str, Dict]]:
+        for word_id, entry in list(self.index.items()):
+            yield entry[0], self.record(word_id)
+
+
+class _ByIdView(MutableMapping):
+    """以 word_id 为键的视图, 行为与 DataManager.word_id_index 相同"""
+
+    def __init__(self, store: LazyWordStore):
+        self._store = store
+
+    def __getitem__(self, word_id):
+        item = self._store.get(word_id)
+        if item is None:
+            raise KeyError(word_id)
+        return item
+
+    def __setitem__(self, word_id, item):
+        self._store.pin(item)
+
+    def __delitem__(self, word_id):
+        if word_id not in self._store.index:
+            raise KeyError(word_id)
+        self._store.remove(word_id)
+
+    def __contains__(self, word_id) -> bool:
+        return word_id in self._store.index
+
+    def __iter__(self):
+        return iter(list(self._store.index))
+
+    def __len__(self) -> int:
+        return len(self._store.index)
+
+
+class _ByWordView(MutableMapping):
+    """以单词为键的视图, 行为与 DataManager.words 相同"""
+
+    def __init__(self, store: LazyWordStore):
+        self._store = store
+
+    def __getitem__(self, word):
+        item = self._store.get(self._store.word_ids[word])
+        if item is None:
+            raise KeyError(word)
+        return item
+
+    def __setitem__(self, word, item):
+        self._store.pin(item)
+
+    def __delitem__(self, word):
+        self._store.remove(self._store.word_ids[word])
+
+    def __contains__(self, word) -> bool:
+        return word in self._store.word_ids
+
+    def __iter__(self):
+        return iter(list(self._store.word_ids))
+
+    def __len__(self) -> int:
+        return len(self._store.word_ids)
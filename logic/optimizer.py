@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Review Parameter Optimizer for Word Memorizer
+调度参数优化 - 用复习记录拟合遗忘曲线, 再在参数空间里随机搜索, 使 "每分钟复习换来的记忆保持率" 最高
+
+    1. 遗忘模型: 回忆概率 R = exp(-decay[c] * t), t 为距上次复习的天数, c 为此前连续答对次数 (上限 MAX_STREAK);
+       每个 c 的 decay 用极大似然在网格上拟合
+    2. 评估: 用候选参数 (logic/sm2.py 向量化 SM-2) 重放记录中的答题, 得到每次复习后安排的间隔 I,
+       预测下次复习时的回忆率 R(I); 每天每个单词的复习成本为 (1 + 遗忘率) / I 次 (遗忘后要多复习一次)
+    3. 得分 = 平均回忆率 / 每个单词每天的复习分钟数; 平均回忆率低于 min_retention 的候选不会入选
+    4. 候选参数分块交给进程池评估
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from logic import sm2
+
+DAY = 86400.0
+MAX_STREAK = 5
+# 同一会话内的重学 (间隔不到半天) 不属于 SM-2 的间隔安排, 不用于拟合遗忘曲线
+MIN_GAP_DAYS = 0.5
+DECAY_GRID = np.logspace(-4, 1, 400)
+DEFAULT_DECAY = 0.1
+
+# 参数名: (下限, 上限); 整数参数在闭区间内均匀取整
+SEARCH_SPACE = {
+    'interval_modifier': (0.5, 1.5),
+    'penalty_factor': (0.05, 0.4),
+    'bonus_factor': (0.0, 0.3),
+    'consecutive_bonus': (2, 6),
+    'min_easiness': (1.1, 1.7),
+}
+
+
+class ReviewHistory:
+    """按时间排序的复习记录数组: 单词行号、质量评分、时间戳、是否答对, 以及每次复习前的连续答对数"""
+
+    def __init__(self, events: Iterable[Tuple[str, float, bool, int]]):
+        events = sorted(events, key=lambda event: event[1])
+        row_of: Dict[str, int] = {}
+        self.rows = np.fromiter((row_of.setdefault(event[0], len(row_of)) for event in events),
+                                dtype=np.int64, count=len(events))
+        self.size = len(row_of)
+        self.timestamps = np.fromiter((event[1] for event in events), dtype=np.float64, count=len(events))
+        self.correct = np.fromiter((bool(event[2]) for event in events), dtype=bool, count=len(events))
+        self.quality = np.fromiter((event[3] for event in events), dtype=np.int64, count=len(events))
+        # 连续答对数只取决于答题结果, 与调度参数无关
+        streak = np.zeros(self.size, dtype=np.int64)
+        self.streak_before = np.zeros(len(events), dtype=np.int64)
+        self.streak_after = np.zeros(len(events), dtype=np.int64)
+        for index, (row, quality) in enumerate(zip(self.rows.tolist(), self.quality.tolist())):
+            self.streak_before[index] = streak[row]
+            streak[row] = streak[row] + 1 if quality >= 3 else 0
+            self.streak_after[index] = streak[row]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def gaps(self) -> np.ndarray:
+        """每次复习距同一单词上一次复习的天数, 第一次为 NaN"""
+        order = np.argsort(self.rows, kind='stable')
+        rows, timestamps = self.rows[order], self.timestamps[order]
+        gaps = np.full(len(self.rows), np.nan)
+        same = rows[1:] == rows[:-1]
+        gaps[order[1:][same]] = (timestamps[1:] - timestamps[:-1])[same] / DAY
+        return gaps
+
+
+def fit_forgetting(history: ReviewHistory) -> np.ndarray:
+    """每个连续答对数 (0..MAX_STREAK) 的遗忘速率; 数据不足时用所有记录合并拟合的值"""
+    gaps = history.gaps()
+    usable = ~np.isnan(gaps) & (gaps >= MIN_GAP_DAYS)
+    streak = np.minimum(history.streak_before[usable], MAX_STREAK)
+    gaps, correct = gaps[usable], history.correct[usable]
+
+    def fit(t: np.ndarray, y: np.ndarray) -> float:
+        if len(t) < 10 or y.all() or not y.any():
+            return np.nan
+        # 对数似然 sum(y * -decay*t + (1-y) * log(1 - exp(-decay*t))), 在网格上取最大
+        exponent = -np.outer(DECAY_GRID, t)
+        loglik = (exponent * y).sum(axis=1) + (np.log(-np.expm1(exponent)) * ~y).sum(axis=1)
+        return float(DECAY_GRID[np.argmax(loglik)])
+
+    pooled = fit(gaps, correct)
+    pooled = DEFAULT_DECAY if np.isnan(pooled) else pooled
+    decay = np.array([fit(gaps[streak == c], correct[streak == c]) for c in range(MAX_STREAK + 1)])
+    return np.where(np.isnan(decay), pooled, decay)
+
+
+def evaluate(params, history: ReviewHistory, decay: np.ndarray, seconds_per_review: float = 8.0) -> Dict:
+    """用 params 重放 history, 返回平均预测回忆率、每个单词每天的复习分钟数和得分"""
+    _, _, _, intervals = sm2.replay(history.rows, history.quality, history.size, params)
+    intervals = np.maximum(intervals, 1)
+    recall = np.exp(-decay[np.minimum(history.streak_after, MAX_STREAK)] * intervals)
+    retention = float(recall.mean())
+    minutes = float(((2 - recall) / intervals).mean()) * seconds_per_review / 60
+    return {'retention': retention, 'minutes_per_word_day': minutes, 'score': retention / minutes}
+
+
+def sample_parameters(count: int, rng: np.random.Generator,
+                      space: Optional[Dict[str, Tuple[float, float]]] = None) -> List[Dict]:
+    space = space or SEARCH_SPACE
+    columns = {}
+    for name, (low, high) in space.items():
+        if isinstance(low, int) and isinstance(high, int):
+            columns[name] = rng.integers(low, high + 1, size=count).tolist()
+        else:
+            columns[name] = np.round(rng.uniform(low, high, size=count), 4).tolist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def evaluate_candidates(base, candidates: List[Dict], history: ReviewHistory, decay: np.ndarray,
+                        seconds_per_review: float) -> List[Dict]:
+    """进程池中每个任务评估一块候选参数"""
+    return [evaluate(replace(base, **candidate), history, decay, seconds_per_review) for candidate in candidates]
+
+
+def optimize(events: Iterable[Tuple[str, float, bool, int]], base, samples: int = 20000,
+             min_retention: float = 0.85, seconds_per_review: float = 8.0,
+             space: Optional[Dict[str, Tuple[float, float]]] = None, workers: Optional[int] = None,
+             chunk_size: int = 500, seed: Optional[int] = None) -> Tuple[object, Dict]:
+    """随机搜索 samples 组参数, 返回 (最优参数, 报告); events 为 (word_id, 时间戳, 是否答对, 质量评分)。
+    没有候选达到 min_retention 时选回忆率最高的; 都不如 base 时返回 base"""
+    history = ReviewHistory(events)
+    if not len(history):
+        raise ValueError("没有复习记录, 无法优化调度参数")
+    decay = fit_forgetting(history)
+    candidates = sample_parameters(samples, np.random.default_rng(seed), space)
+    chunks = [candidates[start:start + chunk_size] for start in range(0, len(candidates), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [result for chunk in chunks
+                   for result in evaluate_candidates(base, chunk, history, decay, seconds_per_review)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate_candidates, base, chunk, history, decay, seconds_per_review)
+                       for chunk in chunks]
+            results = [result for future in futures for result in future.result()]
+
+    baseline = evaluate(base, history, decay, seconds_per_review)
+
+    def rank(result: Dict) -> Tuple:
+        # 达到保持率下限的按得分比较, 否则按保持率比较
+        passed = result['retention'] >= min_retention
+        return (passed, result['score'] if passed else result['retention'])
+
+    best_index = max(range(len(results)), key=lambda index: rank(results[index]))
+    best, best_result = replace(base, **candidates[best_index]), results[best_index]
+    if rank(baseline) >= rank(best_result):
+        best, best_result = base, baseline
+    report = {
+        'events': len(history),
+        'words': history.size,
+        'evaluated': len(results),
+        'decay': decay.round(5).tolist(),
+        'baseline': baseline,
+        'best': best_result,
+        'params': asdict(best),
+    }
+    return best, report
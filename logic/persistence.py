@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Write-behind Persistence Worker for Word Memorizer
+后台持久化线程 - 合并修改, 按防抖间隔或修改数量批量写盘
+"""
+
+import atexit
+import threading
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PersistenceWorker:
+    """把 DataManager 的写盘操作移出 Tk 线程"""
+
+    def __init__(self, data_manager, debounce: float = 2.0, max_dirty: int = 50):
+        self.data_manager = data_manager
+        # 最后一次修改后等待 debounce 秒再写盘, 积累 max_dirty 个修改时立即写盘
+        self.debounce = debounce
+        self.max_dirty = max_dirty
+        self._snapshot_requested = False
+        self._last_change = 0.0
+        self._in_flight = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="persistence-worker", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def notify(self):
+        """DataManager 登记了新的修改 (同一单词的多次修改只写一次)"""
+        with self._cond:
+            self._last_change = time.monotonic()
+            self._cond.notify()
+
+    def request_snapshot(self):
+        """登记一次完整快照, 同时压缩复习日志 (结束会话时使用)"""
+        with self._cond:
+            self._snapshot_requested = True
+            self._last_change = time.monotonic()
+            self._cond.notify()
+
+    @property
+    def pending_count(self) -> int:
+        return self.data_manager.dirty_count
+
+    def _has_work(self) -> bool:
+        return self.data_manager.dirty_count > 0 or self._snapshot_requested
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and not self._has_work():
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # 防抖: 等到修改停止 debounce 秒, 或积累足够多的修改
+                while not self._stopped and self.data_manager.dirty_count < self.max_dirty:
+                    remaining = self._last_change + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopped:
+                    return
+            if not self.flush():
+                # 写盘失败时修改会留在 dirty 集合里, 等一个防抖周期再重试
+                with self._cond:
+                    if not self._stopped:
+                        self._cond.wait(self.debounce)
+
+    def flush(self) -> bool:
+        """在调用线程中立即写入所有待写修改, 返回是否成功"""
+        with self._flush_lock:
+            with self._cond:
+                snapshot = self._snapshot_requested
+                self._snapshot_requested = False
+                self._in_flight += 1
+            saved = False
+            try:
+                saved = self.data_manager.save_progress() if snapshot else self.data_manager.save_dirty()
+                return saved
+            except Exception as e:
+                logger.error(f"后台保存失败: {e}")
+                return False
+            finally:
+                with self._cond:
+                    # 完整快照没有写成功时保留请求, 下次重试
+                    if snapshot and not saved:
+                        self._snapshot_requested = True
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """阻塞直到没有待写或正在写的修改, 超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._has_work() or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self):
+        """停止后台线程并写入剩余修改 (解释器退出时自动调用)"""
+        with self._cond:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.stop)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Indexed Priority Queue for Word Memorizer
+索引优先队列 - 以键 (word_id) 索引的二叉最小堆, 支持 O(log n) 的更新/删除
+
+同一个键只会出现一次: 重新入队等于更新优先级。优先级相同时按入队 (或最近一次更新) 顺序出队,
+不会比较键本身以外的对象。
+"""
+
+import heapq
+from itertools import count
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+
+class IndexedPriorityQueue:
+    """最小堆, 元素为 (priority, seq, key); _pos 记录每个键在堆中的位置"""
+
+    def __init__(self, entries: Iterable[Tuple[float, Hashable]] = ()):
+        # 同一个键出现多次时以最后一次为准
+        latest = {key: priority for priority, key in entries}
+        # 批量建堆交给 heapq (C 实现), 之后再记录位置
+        self._heap: List[Tuple[float, int, Hashable]] = [
+            (priority, seq, key) for seq, (key, priority) in enumerate(latest.items())]
+        heapq.heapify(self._heap)
+        self._pos: Dict[Hashable, int] = dict(zip(map(itemgetter(2), self._heap), range(len(self._heap))))
+        self._seq = count(len(self._heap))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def __contains__(self, key) -> bool:
+        return key in self._pos
+
+    def __iter__(self) -> Iterator[Tuple[float, Hashable]]:
+        """(priority, key), 无序"""
+        return ((priority, key) for priority, _, key in self._heap)
+
+    def priority(self, key) -> Optional[float]:
+        index = self._pos.get(key)
+        return None if index is None else self._heap[index][0]
+
+    def push(self, key, priority: float):
+        """入队; 键已存在时更新它的优先级"""
+        index = self._pos.get(key)
+        entry = (priority, next(self._seq), key)
+        if index is None:
+            self._pos[key] = len(self._heap)
+            self._heap.append(entry)
+            self._sift_up(len(self._heap) - 1)
+            return
+        old = self._heap[index]
+        self._heap[index] = entry
+        if entry < old:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def remove(self, key) -> bool:
+        index = self._pos.pop(key, None)
+        if index is None:
+            return False
+        last = self._heap.pop()
+        if index < len(self._heap):
+            self._heap[index] = last
+            self._pos[last[2]] = index
+            self._sift_up(index)
+            self._sift_down(self._pos[last[2]])
+        return True
+
+    def peek(self) -> Optional[Tuple[float, Hashable]]:
+        if not self._heap:
+            return None
+        priority, _, key = self._heap[0]
+        return priority, key
+
+    def pop(self) -> Tuple[float, Hashable]:
+        if not self._heap:
+            raise IndexError("pop from empty priority queue")
+        heap = self._heap
+        priority, _, key = heap[0]
+        del self._pos[key]
+        last = heap.pop()
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        return priority, key
+
+    def pop_until(self, priority: float, limit: Optional[int] = None) -> List[Tuple[float, Hashable]]:
+        """按顺序取出优先级不超过 priority 的元素, 最多 limit 个"""
+        popped = []
+        heap = self._heap
+        while heap and heap[0][0] <= priority and (limit is None or len(popped) < limit):
+            popped.append(self.pop())
+        return popped
+
+    def clear(self):
+        self._heap.clear()
+        self._pos.clear()
+
+    def _sift_up(self, index: int):
+        heap, pos = self._heap, self._pos
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[index] = heap[parent]
+            pos[heap[index][2]] = index
+            index = parent
+        heap[index] = entry
+        pos[entry[2]] = index
+
+    def _sift_down(self, index: int):
+        heap, pos = self._heap, self._pos
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[index] = heap[child]
+            pos[heap[index][2]] = index
+            index = child
+        heap[index] = entry
+        pos[entry[2]] = index
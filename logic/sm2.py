@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Vectorized SM-2 for Word Memorizer
+向量化 SM-2 - 与 ReviewScheduler.calculate_next_review 相同的更新规则, 一次处理整组单词
+
+结果与标量实现逐位一致: 浮点运算的顺序相同, int() 截断对应 np.trunc。
+用于 "如果 interval_modifier 改成 0.8" 这类整库/整段复习历史的假设模拟。
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def validate_quality(quality: np.ndarray, params):
+    if len(quality) and (quality.min() < params.min_quality or quality.max() > params.perfect_score):
+        raise ValueError(f"质量评分必须在{params.min_quality}-{params.perfect_score}之间")
+
+
+def next_review(interval: np.ndarray, easiness: np.ndarray, consecutive: np.ndarray,
+                quality: np.ndarray, params) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """一次复习后的 (interval, easiness_factor, consecutive_correct), 参数为等长数组"""
+    interval = np.asarray(interval, dtype=np.int64)
+    easiness = np.asarray(easiness, dtype=np.float64)
+    consecutive = np.asarray(consecutive, dtype=np.int64)
+    quality = np.asarray(quality, dtype=np.int64)
+    validate_quality(quality, params)
+
+    failed = quality < 3
+    q_diff = params.perfect_score - quality
+    new_consecutive = np.where(failed, 0, consecutive + 1)
+
+    # 答错: 间隔回到 interval_modifier 天, EF 按 (3 - quality) 扣分
+    failed_interval = max(1, int(params.interval_modifier))
+    failed_ef = np.maximum(params.min_easiness, easiness - params.penalty_factor * (3 - quality))
+
+    # 答对: 1 -> 6 -> 14 -> interval * EF (连续答对达到 consecutive_bonus 次再乘奖励)
+    bonus = np.where(new_consecutive >= params.consecutive_bonus, 1.0 + params.bonus_factor, 1.0)
+    grown = np.maximum(1, np.trunc(interval * easiness * bonus).astype(np.int64))
+    passed_interval = np.where(interval <= 1, 6, np.where(interval == 6, 14, grown))
+    passed_ef = np.maximum(params.min_easiness, easiness + (0.1 - q_diff * (0.08 + q_diff * 0.02)))
+
+    new_interval = np.where(failed, failed_interval, passed_interval)
+    new_interval = np.trunc(new_interval * params.interval_modifier).astype(np.int64)
+    return new_interval, np.where(failed, failed_ef, passed_ef), new_consecutive
+
+
+def replay(rows: np.ndarray, quality: np.ndarray, size: int, params,
+           interval: np.ndarray = None, easiness: np.ndarray = None,
+           consecutive: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """按时间顺序重放复习历史 (rows[i] 为第 i 次复习的单词行号), 起始状态默认为新卡片。
+
+    同一个单词的第 k 次复习只依赖它的第 k-1 次, 所以按 "第几次复习" 分轮, 每轮对所有单词做一次向量更新;
+    轮数等于单个单词的最多复习次数。返回最终的 (interval, easiness_factor, consecutive_correct)
+    和每次复习后的新间隔 (与 rows 对齐)。
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    quality = np.asarray(quality, dtype=np.int64)
+    validate_quality(quality, params)
+    interval = np.ones(size, dtype=np.int64) if interval is None else np.array(interval, dtype=np.int64)
+    easiness = (np.full(size, params.initial_easiness) if easiness is None
+                else np.array(easiness, dtype=np.float64))
+    consecutive = np.zeros(size, dtype=np.int64) if consecutive is None else np.array(consecutive, dtype=np.int64)
+    event_intervals = np.zeros(len(rows), dtype=np.int64)
+    if not len(rows):
+        return interval, easiness, consecutive, event_intervals
+
+    # 每次复习是该单词的第几次: 按单词稳定排序后, 减去所在分组的起点
+    by_row = np.argsort(rows, kind='stable')
+    sorted_rows = rows[by_row]
+    starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    rank = np.empty(len(rows), dtype=np.int64)
+    rank[by_row] = np.arange(len(rows)) - group_start
+
+    by_rank = np.argsort(rank, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        events = by_rank[begin:end]
+        words = rows[events]
+        new_interval, new_ef, new_consecutive = next_review(
+            interval[words], easiness[words], consecutive[words], quality[events], params)
+        interval[words], easiness[words], consecutive[words] = new_interval, new_ef, new_consecutive
+        event_intervals[events] = new_interval
+    return interval, easiness, consecutive, event_intervals
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Binary Progress Snapshot for Word Memorizer
+二进制进度快照 - 定长记录表 + 字符串堆, 通过 mmap 打开并按需解码
+
+文件布局:
+    header   | magic, 版本, 记录数, 创建时间
+    records  | 每个单词一条定长记录: 调度用的数值字段 + 字符串在堆中的 (偏移, 长度)
+    heap     | UTF-8 字符串: word, meaning, pronunciation, word_id, 创建/更新时间,
+               标签 (每个标签前加 \x1f, 空列表为空串), 其余列表字段(JSON)
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'WMSNAP01'
+VERSION = 2
+
+HEADER = struct.Struct('<8sIId')
+# next_review, last_review (epoch 秒), easiness_factor,
+# interval, review_count, correct_count, consecutive_correct, difficulty,
+# 以及 8 个字符串的 (偏移, 长度)
+RECORD = struct.Struct('<3d4iB3x16I')
+
+STRING_FIELDS = ('word', 'meaning', 'pronunciation', 'word_id', 'created_at', 'updated_at')
+LIST_FIELDS = ('tags', 'examples', 'synonyms', 'antonyms')
+TAG_SEPARATOR = '\x1f'
+
+
+def _to_timestamp(iso: Optional[str]) -> float:
+    return datetime.fromisoformat(iso).timestamp() if iso else math.nan
+
+
+def _to_iso(timestamp: float) -> Optional[str]:
+    return None if math.isnan(timestamp) else datetime.fromtimestamp(timestamp).isoformat()
+
+
+def write_snapshot(path: Path, records: Iterable[Dict]):
+    """把记录 (WordItem.to_dict() 格式) 写成二进制快照, 原子替换目标文件"""
+    path = Path(path)
+    table = bytearray()
+    heap = bytearray()
+    count = 0
+
+    def put(text: str) -> Tuple[int, int]:
+        data = text.encode('utf-8')
+        offset = len(heap)
+        heap.extend(data)
+        return offset, len(data)
+
+    for record in records:
+        strings = [put(record.get(key) or '') for key in STRING_FIELDS]
+        strings.append(put(''.join(TAG_SEPARATOR + tag for tag in record.get('tags') or ())))
+        lists = {key: record[key] for key in LIST_FIELDS[1:] if record.get(key)}
+        strings.append(put(json.dumps(lists, ensure_ascii=False)) if lists else (len(heap), 0))
+        table += RECORD.pack(
+            _to_timestamp(record.get('next_review')),
+            _to_timestamp(record.get('last_review')),
+            record.get('easiness_factor', 2.5),
+            record.get('interval', 1),
+            record.get('review_count', 0),
+            record.get('correct_count', 0),
+            record.get('consecutive_correct', 0),
+            record.get('difficulty', 1),
+            *(value for pair in strings for value in pair))
+        count += 1
+
+    tmp_file = path.with_suffix('.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count, datetime.now().timestamp()))
+        f.write(table)
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+class SnapshotReader:
+    """只读打开快照; 打开本身只读取文件头, 记录在访问时才解码"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法 mmap
+            self._file.close()
+            raise ValueError(f"快照文件为空: {self.path}")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"不是有效的进度快照: {self.path}")
+        magic, version, count, created = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"不是有效的进度快照: {self.path}")
+        self.count = count
+        self.created = created
+        self._table = HEADER.size
+        self._heap = HEADER.size + count * RECORD.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._heap + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def _decode(self, fields: Tuple) -> Dict:
+        (next_review, last_review, easiness, interval,
+         review_count, correct_count, consecutive, difficulty) = fields[:8]
+        spans = fields[8:]
+        record = {key: self._string(spans[2 * i], spans[2 * i + 1])
+                  for i, key in enumerate(STRING_FIELDS)}
+        record.update({
+            'difficulty': difficulty,
+            'review_count': review_count,
+            'correct_count': correct_count,
+            'consecutive_correct': consecutive,
+            'last_review': _to_iso(last_review),
+            'next_review': _to_iso(next_review),
+            'easiness_factor': easiness,
+            'interval': interval,
+        })
+        tags = self._string(spans[12], spans[13])
+        record['tags'] = tags[1:].split(TAG_SEPARATOR) if tags else []
+        extra_length = spans[15]
+        lists = json.loads(self._string(spans[14], extra_length)) if extra_length else {}
+        for key in LIST_FIELDS[1:]:
+            record[key] = lists.get(key, [])
+        return record
+
+    def record(self, index: int) -> Dict:
+        """解码第 index 条记录"""
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self._decode(RECORD.unpack_from(self._mm, self._table + index * RECORD.size))
+
+    def word_id(self, index: int) -> str:
+        fields = RECORD.unpack_from(self._mm, self._table + index * RECORD.size)
+        return self._string(fields[14], fields[15])
+
+    def schedule(self) -> Iterator[Tuple]:
+        """只解码调度索引需要的字段: (word_id, word, next_review, interval, easiness_factor, last_review,
+        review_count, correct_count, consecutive_correct, difficulty)"""
+        mm, heap = self._mm, self._heap
+        with memoryview(mm)[self._table:heap] as view:
+            for fields in RECORD.iter_unpack(view):
+                # 启动热路径: 直接切片解码, 不经过 _string
+                id_start = heap + fields[14]
+                word_start = heap + fields[8]
+                yield (mm[id_start:id_start + fields[15]].decode('utf-8'),
+                       mm[word_start:word_start + fields[9]].decode('utf-8'),
+                       fields[0], fields[3], fields[2], fields[1],
+                       fields[4], fields[5], fields[6], fields[7])
+
+    def tags(self) -> Iterator[Tuple[str, List[str]]]:
+        """只解码有标签的单词的 (word_id, 标签)"""
+        mm, heap = self._mm, self._heap
+        with memoryview(mm)[self._table:heap] as view:
+            for fields in RECORD.iter_unpack(view):
+                if not fields[21]:
+                    continue
+                tags_start = heap + fields[20]
+                tags = mm[tags_start:tags_start + fields[21]].decode('utf-8')
+                id_start = heap + fields[14]
+                yield mm[id_start:id_start + fields[15]].decode('utf-8'), tags[1:].split(TAG_SEPARATOR)
+
+    def __iter__(self) -> Iterator[Dict]:
+        with memoryview(self._mm)[self._table:self._heap] as view:
+            for fields in RECORD.iter_unpack(view):
+                yield self._decode(fields)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
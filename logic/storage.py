@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Progress Storage Backends for Word Memorizer
+进度存储后端 - JSON快照+复习日志 / SQLite
+"""
+
+import json
+import math
+import os
+import sqlite3
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic.journal import ReviewJournal
+from logic.snapshot import SnapshotReader, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressStorage:
+    """存储后端接口, 记录格式与 WordItem.to_dict() 相同"""
+
+    name = "base"
+    # 能否按单词读取记录 (延迟加载); 不能时 DataManager 改为完整加载
+    supports_lazy = False
+    # 快照 + 追加日志的后端: 结束会话时写一次完整快照, 把日志压缩掉
+    journaled = False
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # 延迟加载模式下, 界面线程按需读取记录时后台线程可能正在写入; 读取用到的状态 (快照 reader,
+        # _lazy_records) 只在这个锁内访问和替换
+        self._read_lock = threading.RLock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> Dict[str, Dict]:
+        """返回 {单词: 记录}"""
+        raise NotImplementedError
+
+    def save_all(self, records: Dict[str, Dict]):
+        """写入完整快照"""
+        raise NotImplementedError
+
+    def write_records(self, records: List[Dict], deck_size: int) -> bool:
+        """写入 (新增或覆盖) 一批修改过的记录, 返回 True 表示需要压缩为完整快照"""
+        raise NotImplementedError
+
+    def load_index(self) -> Dict[str, Tuple]:
+        """延迟加载模式: 只返回调度索引 {word_id: (word, 调度字段...)}, 字段顺序见 logic.lazy.ScheduleIndex"""
+        raise NotImplementedError
+
+    def load_record(self, word_id: str) -> Dict:
+        """延迟加载模式: 读取一个单词的完整记录"""
+        raise NotImplementedError
+
+    def load_tags(self) -> Dict[str, List[str]]:
+        """延迟加载模式: {word_id: 标签列表}, 只包含有标签的单词, 不读取完整记录"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _timestamp(iso: Optional[str]) -> float:
+    return datetime.fromisoformat(iso).timestamp() if iso else math.nan
+
+
+def _index_entry(record: Dict) -> Tuple:
+    return (record['word'], _timestamp(record['next_review']), record['interval'], record['easiness_factor'],
+            _timestamp(record.get('last_review')), record.get('review_count', 0), record.get('correct_count', 0),
+            record.get('consecutive_correct', 0), record.get('difficulty', 1))
+
+
+class JsonProgressStorage(ProgressStorage):
+    """progress.json 快照 + progress.journal 追加日志"""
+
+    name = "json"
+    journaled = True
+
+    def __init__(self, path: Path, compact_threshold: int = 1000, journal_path: Optional[Path] = None):
+        super().__init__(path)
+        self.journal = ReviewJournal(journal_path or self.path.with_suffix('.journal'))
+        # 日志条数超过 max(compact_threshold, 单词数) 时压缩为快照, 摊还后每次复习仍是O(1)
+        self.compact_threshold = compact_threshold
+
+    def _read_snapshot(self) -> Dict[str, Dict]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('words', {})
+
+    def _write_snapshot(self, records: Dict[str, Dict]):
+        progress_data = {
+            'version': '2.0',
+            'timestamp': datetime.now().isoformat(),
+            'word_count': len(records),
+            'words': records
+        }
+        tmp_file = self.path.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(progress_data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.path)
+
+    def load(self) -> Dict[str, Dict]:
+        records = self._read_snapshot()
+
+        by_id = {record.get('word_id'): record for record in records.values()}
+        replayed = 0
+        for entry in self.journal.replay():
+            record = by_id.get(entry.get('word_id'))
+            if record is not None:
+                record.update(entry)
+            elif 'word' in entry and 'meaning' in entry:
+                # 快照之后新增的单词
+                records[entry['word']] = by_id[entry['word_id']] = entry
+            else:
+                logger.warning(f"复习日志中的单词不存在: {entry.get('word_id')}")
+                continue
+            replayed += 1
+        if replayed:
+            logger.info(f"复习日志回放: {replayed}条")
+        return records
+
+    def save_all(self, records: Dict[str, Dict]):
+        self._write_snapshot(records)
+        # 快照已包含日志中的全部修改
+        self.journal.truncate()
+
+    def write_records(self, records: List[Dict], deck_size: int) -> bool:
+        self.journal.append_many(records)
+        return len(self.journal) >= max(self.compact_threshold, deck_size)
+
+    def close(self):
+        self.journal.close()
+
+
+class BinaryProgressStorage(JsonProgressStorage):
+    """progress.bin 二进制快照 (mmap 读取) + 复习日志"""
+
+    name = "binary"
+    supports_lazy = True
+
+    def __init__(self, path: Path, compact_threshold: int = 1000):
+        super().__init__(path, compact_threshold,
+                         journal_path=Path(path).with_name(Path(path).stem + '_bin.journal'))
+        # 延迟加载模式下保持快照打开: word_id -> 记录行号, 以及快照之后写入日志的记录
+        self._reader: Optional[SnapshotReader] = None
+        self._rows: Dict[str, int] = {}
+        self._lazy_records = None
+
+    def _read_snapshot(self) -> Dict[str, Dict]:
+        with SnapshotReader(self.path) as reader:
+            return {record['word']: record for record in reader}
+
+    def _write_snapshot(self, records: Dict[str, Dict]):
+        if self._reader is None:
+            write_snapshot(self.path, records.values())
+            return
+        rows = {record['word_id']: row for row, record in enumerate(records.values())}
+        if os.name == 'nt':
+            # Windows 上无法替换仍被映射的文件: 先关闭, 写入期间的按需读取只能等待
+            with self._read_lock:
+                self._reader.close()
+                self._reader = None
+                write_snapshot(self.path, records.values())
+                self._reader, self._rows, self._lazy_records = SnapshotReader(self.path), rows, {}
+            return
+        # 旧的映射在替换文件后仍然有效: 先打开新快照, 再一次换掉读取状态 (新快照已包含日志中的修改),
+        # 最后才关闭旧的, 界面线程的读取不会碰到已关闭的 mmap
+        write_snapshot(self.path, records.values())
+        reader = SnapshotReader(self.path)
+        with self._read_lock:
+            old_reader, self._reader, self._rows, self._lazy_records = self._reader, reader, rows, {}
+        old_reader.close()
+
+    def save_all(self, records: Dict[str, Dict]):
+        self._write_snapshot(records)
+        self.journal.truncate()
+
+    def write_records(self, records: List[Dict], deck_size: int) -> bool:
+        needs_compaction = super().write_records(records, deck_size)
+        with self._read_lock:
+            if self._lazy_records is not None:
+                for record in records:
+                    self._lazy_records[record['word_id']] = record
+        return needs_compaction
+
+    def load_index(self) -> Dict[str, Tuple]:
+        reader = SnapshotReader(self.path)
+        rows = {}
+        index = {}
+        for row, (word_id, *entry) in enumerate(reader.schedule()):
+            rows[word_id] = row
+            index[word_id] = tuple(entry)
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+            self._reader, self._rows, self._lazy_records = reader, rows, {}
+            # 日志中的记录比快照新, 保存在内存里覆盖快照
+            for entry in self.journal.replay():
+                word_id = entry.get('word_id')
+                if word_id not in index and not ('word' in entry and 'meaning' in entry):
+                    logger.warning(f"复习日志中的单词不存在: {word_id}")
+                    continue
+                self._lazy_records.setdefault(word_id, {}).update(entry)
+                index[word_id] = _index_entry(self.load_record(word_id))
+        return index
+
+    def load_record(self, word_id: str) -> Dict:
+        with self._read_lock:
+            row = self._rows.get(word_id)
+            record = self._reader.record(row) if row is not None else {}
+            record.update(self._lazy_records.get(word_id, {}))
+        return record
+
+    def load_tags(self) -> Dict[str, List[str]]:
+        with self._read_lock:
+            tags = dict(self._reader.tags())
+            # 日志中的记录比快照新
+            for word_id, record in self._lazy_records.items():
+                if 'tags' in record:
+                    tags[word_id] = record['tags']
+        return tags
+
+    def close(self):
+        super().close()
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+
+class SqliteProgressStorage(ProgressStorage):
+    """SQLite 存储: 每次复习只更新一行"""
+
+    name = "sqlite"
+    supports_lazy = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS words (
+            word_id TEXT PRIMARY KEY,
+            word TEXT NOT NULL UNIQUE,
+            meaning TEXT NOT NULL,
+            pronunciation TEXT NOT NULL DEFAULT '',
+            difficulty INTEGER NOT NULL DEFAULT 1,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            correct_count INTEGER NOT NULL DEFAULT 0,
+            consecutive_correct INTEGER NOT NULL DEFAULT 0,
+            last_review TEXT,
+            next_review TEXT,
+            next_review_ts REAL,
+            easiness_factor REAL NOT NULL DEFAULT 2.5,
+            interval INTEGER NOT NULL DEFAULT 1,
+            examples TEXT NOT NULL DEFAULT '[]',
+            synonyms TEXT NOT NULL DEFAULT '[]',
+            antonyms TEXT NOT NULL DEFAULT '[]',
+            created_at TEXT,
+            updated_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS word_tags (
+            word_id TEXT NOT NULL REFERENCES words(word_id) ON DELETE CASCADE,
+            tag TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (word_id, tag)
+        );
+        CREATE INDEX IF NOT EXISTS idx_words_next_review ON words(next_review_ts);
+        CREATE INDEX IF NOT EXISTS idx_words_difficulty ON words(difficulty);
+        CREATE INDEX IF NOT EXISTS idx_word_tags_tag ON word_tags(tag);
+    """
+
+    COLUMNS = ('word_id', 'word', 'meaning', 'pronunciation', 'difficulty', 'review_count',
+               'correct_count', 'consecutive_correct', 'last_review', 'next_review',
+               'next_review_ts', 'easiness_factor', 'interval', 'examples', 'synonyms',
+               'antonyms', 'created_at', 'updated_at')
+    LIST_COLUMNS = ('examples', 'synonyms', 'antonyms')
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+        if 'position' not in {row[1] for row in self.conn.execute("PRAGMA table_info(word_tags)")}:
+            # 旧数据库没有标签顺序; 已有的行按插入顺序 (rowid) 读出
+            self.conn.execute("ALTER TABLE word_tags ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+        self.conn.commit()
+
+    @staticmethod
+    def _timestamp(iso: Optional[str]) -> Optional[float]:
+        return datetime.fromisoformat(iso).timestamp() if iso else None
+
+    def exists(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM words LIMIT 1").fetchone() is not None
+
+    def load_tags(self) -> Dict[str, List[str]]:
+        """{word_id: 标签列表}, 只包含有标签的单词"""
+        tags = defaultdict(list)
+        for word_id, tag in self.conn.execute("SELECT word_id, tag FROM word_tags ORDER BY position, rowid"):
+            tags[word_id].append(tag)
+        return tags
+
+    def load(self) -> Dict[str, Dict]:
+        tags = self.load_tags()
+        records = {}
+        columns = [c for c in self.COLUMNS if c != 'next_review_ts']
+        for row in self.conn.execute(f"SELECT {', '.join(columns)} FROM words"):
+            record = dict(zip(columns, row))
+            for key in self.LIST_COLUMNS:
+                record[key] = json.loads(record[key])
+            record['tags'] = tags.get(record['word_id'], [])
+            records[record['word']] = record
+        return records
+
+    def _row(self, record: Dict) -> Tuple:
+        values = dict(record)
+        values['next_review_ts'] = self._timestamp(record.get('next_review'))
+        for key in self.LIST_COLUMNS:
+            values[key] = json.dumps(record.get(key, []), ensure_ascii=False)
+        return tuple(values.get(c) for c in self.COLUMNS)
+
+    @staticmethod
+    def _tag_rows(records: Iterable[Dict]) -> List[Tuple[str, str, int]]:
+        """(word_id, 标签, 序号): 标签按原顺序保存, 与其它后端一样保留空标签"""
+        return [(r['word_id'], tag, position) for r in records
+                for position, tag in enumerate(r.get('tags') or ())]
+
+    def save_all(self, records: Dict[str, Dict]):
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        with self.conn:
+            self.conn.execute("DELETE FROM word_tags")
+            self.conn.execute("DELETE FROM words")
+            self.conn.executemany(
+                f"INSERT INTO words ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [self._row(r) for r in records.values()])
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO word_tags (word_id, tag, position) VALUES (?, ?, ?)",
+                self._tag_rows(records.values()))
+
+    def write_records(self, records: List[Dict], deck_size: int) -> bool:
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO words ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [self._row(r) for r in records])
+            self.conn.executemany("DELETE FROM word_tags WHERE word_id = ?",
+                                  [(r['word_id'],) for r in records])
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO word_tags (word_id, tag, position) VALUES (?, ?, ?)",
+                self._tag_rows(records))
+        return False
+
+    def load_index(self) -> Dict[str, Tuple]:
+        return {word_id: (word, next_review, interval, easiness, _timestamp(last_review),
+                          review_count, correct_count, consecutive, difficulty)
+                for word_id, word, next_review, interval, easiness, last_review,
+                review_count, correct_count, consecutive, difficulty
+                in self.conn.execute(
+                    "SELECT word_id, word, next_review_ts, interval, easiness_factor, last_review, "
+                    "review_count, correct_count, consecutive_correct, difficulty FROM words")}
+
+    def load_record(self, word_id: str) -> Dict:
+        columns = [c for c in self.COLUMNS if c != 'next_review_ts']
+        row = self.conn.execute(f"SELECT {', '.join(columns)} FROM words WHERE word_id = ?",
+                                (word_id,)).fetchone()
+        if row is None:
+            raise KeyError(word_id)
+        record = dict(zip(columns, row))
+        for key in self.LIST_COLUMNS:
+            record[key] = json.loads(record[key])
+        record['tags'] = [tag for (tag,) in self.conn.execute(
+            "SELECT tag FROM word_tags WHERE word_id = ? ORDER BY position, rowid", (word_id,))]
+        return record
+
+    def close(self):
+        self.conn.close()
+
+
+def create_storage(kind: str, data_dir: Path, compact_threshold: int = 1000) -> ProgressStorage:
+    if kind == "json":
+        return JsonProgressStorage(Path(data_dir) / "progress.json", compact_threshold)
+    if kind == "binary":
+        return BinaryProgressStorage(Path(data_dir) / "progress.bin", compact_threshold)
+    if kind == "sqlite":
+        return SqliteProgressStorage(Path(data_dir) / "progress.db")
+    raise ValueError(f"不支持的存储类型: {kind}")
+
+
+def migrate_from_json(data_dir: Path, target: ProgressStorage) -> int:
+    """把已有的 progress.json (含未压缩的复习日志) 迁移到其它存储后端, 返回迁移的单词数"""
+    source = JsonProgressStorage(Path(data_dir) / "progress.json")
+    if not source.exists():
+        return 0
+    records = source.load()
+    target.save_all(records)
+    source.close()
+    logger.info(f"已将 {len(records)} 个单词从 progress.json 迁移到 {target.name}")
+    return len(records)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tag Index for Word Memorizer
+标签倒排索引 - 标签 -> word_id 集合, 随单词的导入和修改增量维护, 支持 AND/OR/NOT 布尔查询
+
+查询语法 (运算符不区分大小写, 优先级 NOT > AND > OR, 相邻的两项之间省略运算符时视为 AND):
+
+    cet6 AND NOT verb
+    (cet4 OR cet6) advanced
+    "phrasal verb" OR idiom     | 含空格或与运算符同名的标签用双引号括起来
+
+求值从最小的集合出发: AND 取交集时遍历最小的一项, "A AND NOT B" 作为差集计算,
+代价与参与运算的集合大小成正比; 只有单独的 NOT (没有正向的项) 才需要全部单词作为全集。
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# 解析后的查询: ('tag', 名称) / ('and', [子项]) / ('or', [子项]) / ('not', 子项)
+Query = Tuple[str, Union[str, List, Tuple]]
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    """[(类型, 值)], 类型为 '(' / ')' / 'op' / 'tag'"""
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            raise ValueError(f"标签查询语法错误 (第 {position + 1} 个字符): {expression}")
+        position = match.end()
+        left, right, quoted, word = match.groups()
+        if left:
+            tokens.append(('(', left))
+        elif right:
+            tokens.append((')', right))
+        elif quoted is not None:
+            tokens.append(('tag', quoted))
+        elif word.upper() in _OPERATORS:
+            tokens.append(('op', word.upper()))
+        else:
+            tokens.append(('tag', word))
+    return tokens
+
+
+def parse_query(expression: str) -> Query:
+    """把查询字符串解析成查询树; 语法错误时抛出 ValueError"""
+    tokens = _tokenize(expression)
+    position = 0
+
+    def peek() -> Optional[Tuple[str, str]]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> Tuple[str, str]:
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ValueError(f"标签查询不完整: {expression}")
+        position += 1
+        return token
+
+    def parse_or() -> Query:
+        terms = [parse_and()]
+        while peek() == ('op', 'OR'):
+            take()
+            terms.append(parse_and())
+        return terms[0] if len(terms) == 1 else ('or', terms)
+
+    def parse_and() -> Query:
+        terms = [parse_not()]
+        while peek() is not None and peek() not in (('op', 'OR'), (')', ')')):
+            if peek() == ('op', 'AND'):
+                take()
+            terms.append(parse_not())
+        return terms[0] if len(terms) == 1 else ('and', terms)
+
+    def parse_not() -> Query:
+        kind, value = take()
+        if (kind, value) == ('op', 'NOT'):
+            return ('not', parse_not())
+        if kind == '(':
+            query = parse_or()
+            if take() != (')', ')'):
+                raise ValueError(f"标签查询缺少右括号: {expression}")
+            return query
+        if kind == 'tag':
+            return ('tag', value)
+        raise ValueError(f"标签查询中 '{value}' 的位置不正确: {expression}")
+
+    if not tokens:
+        raise ValueError("标签查询为空")
+    query = parse_or()
+    if peek() is not None:
+        raise ValueError(f"标签查询中 '{peek()[1]}' 的位置不正确: {expression}")
+    return query
+
+
+def unique_tags(tags: Iterable[str]) -> Tuple[str, ...]:
+    """去掉重复的标签 (保留顺序); 存储中可能有修复前写入的重复标签"""
+    return tuple(dict.fromkeys(tags))
+
+
+def matches(query: Query, tags: Iterable[str]) -> bool:
+    """单个单词 (标签为 tags) 是否满足查询"""
+    kind, value = query
+    if kind == 'tag':
+        return value in tags
+    if kind == 'not':
+        return not matches(value, tags)
+    if kind == 'and':
+        return all(matches(term, tags) for term in value)
+    return any(matches(term, tags) for term in value)
+
+
+class TagIndex:
+    """words: 标签 -> word_id 集合; tags_of: word_id -> 标签 (只包含有标签的单词)。
+    延迟加载模式下索引可以稍后再建: 建立之前 loaded 为 False, update 不做任何事"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.words: Dict[str, Set[str]] = {}
+        self.tags_of: Dict[str, Tuple[str, ...]] = {}
+        self.loaded = False
+
+    def load(self, word_tags: Iterable[Tuple[str, Iterable[str]]]):
+        self.words = {}
+        self.tags_of = {}
+        for word_id, tags in word_tags:
+            self._add(word_id, unique_tags(tags))
+        self.loaded = True
+
+    def _add(self, word_id: str, tags: Tuple[str, ...]):
+        if not tags:
+            return
+        self.tags_of[word_id] = tags
+        for tag in tags:
+            self.words.setdefault(tag, set()).add(word_id)
+
+    def _discard(self, word_id: str):
+        for tag in self.tags_of.pop(word_id, ()):
+            word_ids = self.words[tag]
+            word_ids.discard(word_id)
+            if not word_ids:
+                del self.words[tag]
+
+    def update(self, word_id: str, tags: Iterable[str]):
+        """单词的标签变为 tags; 没有变化时只比较一次"""
+        if not self.loaded:
+            return
+        tags = unique_tags(tags)
+        if self.tags_of.get(word_id, ()) == tags:
+            return
+        self._discard(word_id)
+        self._add(word_id, tags)
+
+    def remove(self, word_id: str):
+        if self.loaded:
+            self._discard(word_id)
+
+    def tags(self) -> List[str]:
+        return sorted(self.words)
+
+    def query(self, query: Union[str, Query], universe: Callable[[], Iterable[str]]) -> Set[str]:
+        """满足查询的 word_id 集合; universe 返回全部 word_id, 只在查询含有单独的 NOT 时调用"""
+        if isinstance(query, str):
+            query = parse_query(query)
+        result = self._evaluate(query, universe)
+        # 单个标签的结果是索引里的集合本身, 返回副本
+        return set(result) if query[0] == 'tag' else result
+
+    def _evaluate(self, query: Query, universe: Callable[[], Iterable[str]]) -> Set[str]:
+        kind, value = query
+        if kind == 'tag':
+            return self.words.get(value, set())
+        if kind == 'or':
+            return set().union(*(self._evaluate(term, universe) for term in value))
+        if kind == 'not':
+            return set(universe()).difference(self._evaluate(value, universe))
+
+        positive = [self._evaluate(term, universe) for term in value if term[0] != 'not']
+        negative = [self._evaluate(term[1], universe) for term in value if term[0] == 'not']
+        if not positive:
+            return set(universe()).difference(*negative)
+        positive.sort(key=len)
+        smallest, others = positive[0], positive[1:]
+        result = {word_id for word_id in smallest if all(word_id in other for other in others)}
+        return result.difference(*negative)
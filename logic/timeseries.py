@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Review Time Series for Word Memorizer
+复习时间序列 - 由复习事件累加出每小时/每天的复习数、答对数和用时, 查询 "最近 N 天" 只访问 N 个桶
+
+    hourly  | 本地时间每小时一个桶, 只保留最近 hourly_days 天
+    daily   | 本地日期每天一个桶, 保留 daily_days 天
+
+每个事件同时计入两层; 超出保留期的小时桶直接丢弃 (它们已经计入了日桶), 所以文件大小有上界。
+原始事件在 events.log 中; events_folded 记录已累加的事件数, 重启时从日志补上未保存的部分。
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 桶: [复习数, 答对数, 用时(秒)]
+REVIEWS, CORRECT, SECONDS = range(3)
+
+
+def _bucket_dict(bucket: List, key: str, label: str) -> Dict:
+    reviews, correct, seconds = bucket
+    return {
+        label: key,
+        'reviews': reviews,
+        'correct': correct,
+        'minutes': round(seconds / 60, 1),
+        'accuracy': round(correct / reviews * 100, 2) if reviews else 0
+    }
+
+
+class ReviewTimeSeries:
+    def __init__(self, path: Path, hourly_days: int = 14, daily_days: int = 3650):
+        self.path = Path(path)
+        self.hourly_days = hourly_days
+        self.daily_days = daily_days
+        # "YYYY-MM-DDTHH" / "YYYY-MM-DD" -> [复习数, 答对数, 用时]
+        self.hourly: Dict[str, List] = {}
+        self.daily: Dict[str, List] = {}
+        self.events_folded = 0
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.hourly = data.get('hourly', {})
+            self.daily = data.get('daily', {})
+            self.events_folded = data.get('events_folded', 0)
+        except Exception as e:
+            # 时间序列可以从事件日志重建
+            logger.error(f"读取复习时间序列失败, 将从事件日志重建: {e}")
+            self.hourly, self.daily, self.events_folded = {}, {}, 0
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.rollup()
+        tmp_file = self.path.with_suffix('.tmp')
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'events_folded': self.events_folded, 'hourly': self.hourly, 'daily': self.daily},
+                          f, separators=(',', ':'))
+            os.replace(tmp_file, self.path)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"保存复习时间序列失败: {e}")
+
+    def record(self, timestamp: float, correct: bool, seconds: float = 0.0):
+        """累加一次复习 (timestamp 为 epoch 秒)"""
+        moment = datetime.fromtimestamp(timestamp)
+        for buckets, key in ((self.daily, moment.date().isoformat()),
+                             (self.hourly, moment.strftime('%Y-%m-%dT%H'))):
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0, 0, 0.0]
+            bucket[REVIEWS] += 1
+            bucket[CORRECT] += bool(correct)
+            bucket[SECONDS] += seconds
+        self.events_folded += 1
+        self.dirty = True
+
+    def fold(self, events: Iterable[Dict]):
+        """累加事件日志中的复习事件 (没有用时信息)"""
+        for event in events:
+            self.record(datetime.fromisoformat(event['timestamp']).timestamp(), event['correct'])
+
+    def rollup(self, now: Optional[float] = None):
+        """丢弃超出保留期的小时桶和日桶"""
+        today = datetime.fromtimestamp(now).date() if now is not None else date.today()
+        hourly_start = (today - timedelta(days=self.hourly_days - 1)).isoformat()
+        daily_start = (today - timedelta(days=self.daily_days - 1)).isoformat()
+        # 键是 ISO 格式, 字符串比较即时间比较
+        for buckets, start in ((self.hourly, hourly_start), (self.daily, daily_start)):
+            for key in [key for key in buckets if key < start]:
+                del buckets[key]
+                self.dirty = True
+
+    def daily_series(self, days: int = 30, end: Optional[date] = None) -> List[Dict]:
+        """截至 end (默认今天) 的最近 days 天, 按日期升序, 没有复习的日子为 0"""
+        end = end or date.today()
+        empty = [0, 0, 0.0]
+        return [_bucket_dict(self.daily.get(key, empty), key, 'date')
+                for key in ((end - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1))]
+
+    def hourly_series(self, hours: int = 24, end: Optional[datetime] = None) -> List[Dict]:
+        """截至 end (默认现在) 的最近 hours 小时; 超出 hourly_days 的部分已汇总到日桶, 显示为 0"""
+        end = (end or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        empty = [0, 0, 0.0]
+        return [_bucket_dict(self.hourly.get(key, empty), key, 'hour')
+                for key in ((end - timedelta(hours=offset)).strftime('%Y-%m-%dT%H')
+                            for offset in range(hours - 1, -1, -1))]
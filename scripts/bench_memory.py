@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark for WordItem
+单词条目内存基准 - 比较 __slots__ + epoch 时间戳的 WordItem 与旧版 dataclass 的每词字节数
+
+Usage:
+    python scripts/bench_memory.py                 # 100k 和 1M 单词
+    python scripts/bench_memory.py --sizes 10000
+"""
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from logic.core import WordItem
+
+TAGS = ['cet4', 'cet6', 'toefl', 'ielts', 'gre', 'business', 'academic', 'daily']
+
+
+@dataclass
+class LegacyWordItem:
+    """改造前的 WordItem 表示 (普通 dataclass, ISO 字符串时间戳, 每个单词四个列表)"""
+    word: str
+    meaning: str
+    pronunciation: str = ""
+    difficulty: int = 1
+    review_count: int = 0
+    correct_count: int = 0
+    consecutive_correct: int = 0
+    last_review: Optional[str] = None
+    next_review: Optional[str] = None
+    easiness_factor: float = 2.5
+    interval: int = 1
+    tags: List[str] = field(default_factory=list)
+    examples: List[str] = field(default_factory=list)
+    synonyms: List[str] = field(default_factory=list)
+    antonyms: List[str] = field(default_factory=list)
+    word_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def __post_init__(self):
+        if self.last_review is None:
+            self.last_review = datetime.now().isoformat()
+        if self.next_review is None:
+            self.next_review = datetime.now().isoformat()
+
+
+def make_rows(count: int, seed: int = 42) -> List[dict]:
+    """生成构造参数 (从 CSV 解析出来的字符串本来就要占内存, 不计入单词对象)"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        # 从 CSV 解析出的标签是各自独立的字符串对象
+        tags = [''.join(tag) for tag in rng.sample(TAGS, rng.randint(0, 2))]
+        rows.append({
+            'word': f"word{i}",
+            'meaning': f"释义{i}",
+            'pronunciation': f"/wɜːd{i}/",
+            'difficulty': rng.randint(1, 5),
+            'tags': tags,
+        })
+    return rows
+
+
+def measure(cls, rows: List[dict]) -> int:
+    """返回构造 len(rows) 个对象新分配的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [cls(**row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WordItem memory benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'words':>10} {'legacy B/word':>14} {'slots B/word':>13} {'saving':>8}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        legacy = measure(LegacyWordItem, rows) / size
+        slots = measure(WordItem, rows) / size
+        print(f"{size:>10} {legacy:>14.1f} {slots:>13.1f} {1 - slots / legacy:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
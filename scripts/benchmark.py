@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Core Benchmark Suite for Word Memorizer
+核心基准测试 - 用合成词库 (1k/100k/1M) 计时 logic/core.py 的主要操作, 结果写成 JSON 便于比较
+
+每个词库规模在独立的子进程中运行, 峰值内存 (peak_rss_mb) 互不影响;
+--trace-memory 额外用 tracemalloc 记录每个操作的分配峰值 (会明显变慢)
+
+Usage:
+    python scripts/benchmark.py                              # 1k, 100k, 1M
+    python scripts/benchmark.py --sizes 1000 100000 -o bench.json
+    python scripts/benchmark.py --storage binary --lazy
+    python scripts/benchmark.py --compare old.json new.json   # 比较两次结果, 有回退时退出码为 1
+"""
+
+import argparse
+import csv
+import json
+import logging
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+# 难度分布: 中等难度居多
+DIFFICULTY_WEIGHTS = {1: 15, 2: 30, 3: 30, 4: 17, 5: 8}
+# 标签按出现频率从高到低, 第 k 个标签的权重约为 1/k
+TAGS = ['cet4', 'cet6', 'daily', 'academic', 'business', 'toefl', 'ielts', 'gre', 'medical', 'legal']
+TAG_WEIGHTS = [1 / (k + 1) for k in range(len(TAGS))]
+SYLLABLES = ['ab', 'con', 'de', 'ex', 'in', 'pro', 're', 'sub', 'trans', 'un', 'ver', 'mis', 'lo', 'ta', 'ri']
+
+def generate_deck(path: Path, count: int, seed: int = 42):
+    """写一个 count 个单词的合成 CSV 词库, 列与 data/words_cet6.csv 相同并带 tags/examples"""
+    rng = random.Random(seed)
+    levels, level_weights = list(DIFFICULTY_WEIGHTS), list(DIFFICULTY_WEIGHTS.values())
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['word', 'meaning', 'pronunciation', 'difficulty', 'tags', 'examples'])
+        for i in range(count):
+            stem = ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            word = f"{stem}{i}"
+            tags = set(rng.choices(TAGS, TAG_WEIGHTS, k=rng.choice((0, 1, 1, 2, 3))))
+            examples = [f"Example {j} for {word}." for j in range(rng.randint(0, 2))]
+            writer.writerow([word, f"释义{i}", f"/{stem}/", rng.choices(levels, level_weights)[0],
+                             ','.join(sorted(tags)), ';'.join(examples)])
+
+
+def age_deck(data_manager, seed: int = 42, reviewed_ratio: float = 0.7):
+    """给词库加上复习历史: 约 reviewed_ratio 的单词复习过, 其中一部分已经到期"""
+    rng = random.Random(seed)
+    now = datetime.now().timestamp()
+    day = timedelta(days=1).total_seconds()
+    for item in data_manager.word_id_index.values():
+        if rng.random() >= reviewed_ratio:
+            continue
+        item.review_count = rng.randint(1, 12)
+        item.correct_count = sum(rng.random() < 0.8 for _ in range(item.review_count))
+        item.consecutive_correct = rng.randint(0, item.correct_count)
+        item.interval = rng.choice((1, 6, 14, 30, 60, 120))
+        item.easiness_factor = round(rng.uniform(1.3, 2.9), 2)
+        item.last_review_ts = now - rng.uniform(0, 60) * day
+        item.next_review_ts = item.last_review_ts + item.interval * day
+        data_manager.mark_dirty(item)
+
+
+class Recorder:
+    """收集每个操作的耗时 (以及可选的 tracemalloc 峰值)"""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.results: Dict[str, Dict] = {}
+
+    @contextmanager
+    def measure(self, name: str, ops: int = 1):
+        """计时 with 块; 块内可以改写 yield 出的 dict 中的 'ops' (操作次数事先未知时)"""
+        counter = {'ops': ops}
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield counter
+        finally:
+            elapsed = time.perf_counter() - start
+            ops = max(counter['ops'], 1)
+            result = {'seconds': round(elapsed, 6), 'ops': ops, 'us_per_op': round(elapsed / ops * 1e6, 2)}
+            if self.trace_memory:
+                result['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                tracemalloc.stop()
+            self.results[name] = result
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB, macOS 是字节
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def run_size(size: int, storage: str = "json", lazy: bool = False, answers: int = 1000,
+             trace_memory: bool = False, seed: int = 42) -> Dict:
+    """在一个临时数据目录里跑完整的一轮基准, 返回 {操作: 结果}"""
+    logging.disable(logging.CRITICAL)
+    from logic.core import DataManager, MemorizerCore
+    from logic.due_calendar import DueCalendar
+
+    recorder = Recorder(trace_memory)
+    data_dir = Path(tempfile.mkdtemp(prefix=f"wm_bench_{size}_"))
+    try:
+        generate_deck(data_dir / "deck.csv", size, seed)
+
+        manager = DataManager(str(data_dir), storage=storage)
+        with recorder.measure('load_words_from_csv', size):
+            manager.load_words_from_csv("deck.csv", "benchmark")
+        age_deck(manager, seed)
+        with recorder.measure('save_progress', size):
+            manager.save_progress()
+        manager.storage.close()
+        del manager
+
+        core = MemorizerCore(str(data_dir), storage=storage, lazy=lazy)
+        with recorder.measure('load_progress', size):
+            core.data_manager.load_progress()
+        with recorder.measure('_initialize_review_queues'):
+            core._initialize_review_queues()
+
+        rng = random.Random(seed)
+        word_ids = list(core.data_manager.columns.word_ids)
+        items = [core.get_next_review_item() or core.data_manager.get_word_by_id(rng.choice(word_ids))
+                 for _ in range(answers)]
+        with recorder.measure('submit_answer', answers):
+            for item in items:
+                core.submit_answer(item, rng.random() < 0.8, rng.randint(0, 5))
+
+        with recorder.measure('get_statistics'):
+            core.data_manager.get_statistics()
+        # 数据没有变化时直接返回缓存的结果
+        with recorder.measure('get_statistics_cached'):
+            core.data_manager.get_statistics()
+
+        # 所有单词按 next_review 放入到期日历, 反复取出到期的一批
+        columns = core.data_manager.columns
+        core.scheduler.due_calendar = DueCalendar.from_arrays(columns.word_ids, columns['next_review'])
+        with recorder.measure('get_due_items') as counter:
+            counter['ops'] = 0
+            while counter['ops'] < 200 and core.scheduler.get_due_items(50):
+                counter['ops'] += 1
+
+        # 假设模拟: interval_modifier=0.8 时重放与词库等量的复习历史
+        history = [(rng.choice(word_ids), rng.randint(0, 5)) for _ in range(size)]
+        with recorder.measure('simulate_parameters', len(history)):
+            core.simulate_parameters(history, interval_modifier=0.8)
+
+        core.persistence.stop()
+        core.data_manager.storage.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {'operations': recorder.results, 'peak_rss_mb': _peak_rss_mb()}
+
+
+def _environment() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': numpy_version,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 1.2) -> List[str]:
+    """打印两次结果的耗时比值, 返回超过 threshold 倍的回退项"""
+    regressions = []
+    print(f"{'size':>9} {'operation':<28} {'baseline s':>11} {'current s':>11} {'ratio':>7}")
+    for size, result in current['results'].items():
+        base = baseline['results'].get(size)
+        if base is None:
+            continue
+        for name, timing in result['operations'].items():
+            base_timing = base['operations'].get(name)
+            if base_timing is None or base_timing['seconds'] <= 0:
+                continue
+            ratio = timing['seconds'] / base_timing['seconds']
+            flag = ''
+            if ratio > threshold:
+                flag = '  REGRESSION'
+                regressions.append(f"{size}/{name}")
+            print(f"{size:>9} {name:<28} {base_timing['seconds']:>11.4f} {timing['seconds']:>11.4f} "
+                  f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def print_results(report: Dict):
+    for size, result in report['results'].items():
+        print(f"\n{size} words ({report['config']['storage']}{', lazy' if report['config']['lazy'] else ''}), "
+              f"peak RSS {result['peak_rss_mb']} MB")
+        for name, timing in result['operations'].items():
+            memory = f"  peak alloc {timing['peak_alloc_mb']} MB" if 'peak_alloc_mb' in timing else ''
+            print(f"  {name:<28} {timing['seconds']:>10.4f} s  {timing['us_per_op']:>12.2f} us/op{memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word Memorizer core benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--storage', choices=['json', 'binary', 'sqlite'], default='json')
+    parser.add_argument('--lazy', action='store_true', help="load progress in lazy mode (binary/sqlite storage only)")
+    parser.add_argument('--answers', type=int, default=1000, help="submit_answer calls per size")
+    parser.add_argument('--trace-memory', action='store_true', help="tracemalloc peak per operation (slow)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against a previous results file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="only compare two existing results files")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio reported as regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(p).read_text(encoding='utf-8')) for p in args.compare)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    report = {
+        'environment': _environment(),
+        'config': {'storage': args.storage, 'lazy': args.lazy, 'answers': args.answers, 'seed': args.seed},
+        'results': {},
+    }
+    for size in args.sizes:
+        # 每个规模用新进程, 峰值 RSS 只反映这一轮
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            report['results'][str(size)] = pool.submit(
+                run_size, size, args.storage, args.lazy, args.answers, args.trace_memory, args.seed).result()
+    print_results(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        print()
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        sys.exit(1 if compare(baseline, report, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
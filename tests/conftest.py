@@ -0,0 +1,32 @@
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # 工作目录定义为根目录
+
+from logic.core import DataManager
+
+
+def write_deck(path, count: int, tags=None):
+    """写一个 count 个单词的小词库 CSV; tags 为每个单词的标签字符串 (逗号分隔)"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['word', 'meaning', 'difficulty', 'tags'])
+        for i in range(count):
+            writer.writerow([f"word{i}", f"meaning{i}", i % 5 + 1, tags[i] if tags else ''])
+
+
+@pytest.fixture
+def deck_dir(tmp_path):
+    write_deck(tmp_path / "deck.csv", 20)
+    return tmp_path
+
+
+@pytest.fixture
+def data_manager(deck_dir):
+    manager = DataManager(str(deck_dir))
+    manager.load_words_from_csv("deck.csv", "test")
+    manager.save_progress()
+    return manager
@@ -0,0 +1,55 @@
+import time
+
+from logic.core import DataManager
+
+
+def _meanings(manager: DataManager):
+    return {word: item.meaning for word, item in manager.words.items()}
+
+
+def _set_meanings(manager: DataManager, meaning: str):
+    for item in list(manager.word_id_index.values()):
+        manager.update_word_item(item.word_id, meaning=meaning)
+    manager.save_dirty()
+
+
+def test_restore_then_delta_backup_matches_live_deck(data_manager):
+    # 每次保存都备份, 增量备份依赖恢复后的状态
+    data_manager.backups.every_changes = 1
+    _set_meanings(data_manager, "v1")
+    data_manager._maybe_backup(force=True)
+    time.sleep(0.01)
+    v1_time = data_manager.backups.list_backups()[-1][0]
+    _set_meanings(data_manager, "v2")
+
+    assert data_manager.restore_backup(v1_time)
+    assert set(_meanings(data_manager).values()) == {"v1"}
+
+    item = data_manager.words["word0"]
+    data_manager.update_word_item(item.word_id, meaning="edited")
+    data_manager.save_dirty()
+    assert data_manager.backups.list_backups()[-1][1] == "delta"
+
+    restored = data_manager.backups.restore()
+    assert {word: record['meaning'] for word, record in restored.items()} == _meanings(data_manager)
+
+
+def test_delta_backups_survive_restart(deck_dir, data_manager):
+    data_manager.backups.every_changes = 1
+    data_manager._maybe_backup(force=True)
+    item = data_manager.words["word3"]
+    data_manager.update_word_item(item.word_id, meaning="changed")
+    data_manager.save_dirty()
+
+    reopened = DataManager(str(deck_dir))
+    reopened.load_progress()
+    reopened.backups.every_changes = 1
+    item = reopened.words["word4"]
+    reopened.update_word_item(item.word_id, meaning="after restart")
+    reopened.save_dirty()
+
+    assert reopened.backups.list_backups()[-1][1] == "delta"
+    restored = reopened.backups.restore()
+    assert restored["word3"]['meaning'] == "changed"
+    assert restored["word4"]['meaning'] == "after restart"
+    assert restored["word5"]['meaning'] == "meaning5"
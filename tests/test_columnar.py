@@ -0,0 +1,26 @@
+import random
+
+import numpy as np
+import pytest
+
+from logic.columnar import ORDERINGS, DeckColumns, item_priority
+from logic.core import WordItem
+
+NOW = 1_700_000_000.0
+
+
+@pytest.mark.parametrize("method", ORDERINGS)
+def test_item_priority_matches_columns(method):
+    rng = random.Random(3)
+    items = []
+    for i in range(50):
+        item = WordItem(f"word{i}", f"meaning{i}", difficulty=rng.randint(1, 5))
+        item.interval = rng.randint(0, 30)
+        item.review_count = rng.randint(0, 6)
+        item.correct_count = rng.randint(0, item.review_count)
+        item.next_review_ts = NOW - rng.uniform(-5, 20) * 86400
+        items.append(item)
+    columns = DeckColumns()
+    columns.load_items(items)
+    keys = columns.priority(columns.rows(item.word_id for item in items), method, 1.5, NOW)
+    assert np.allclose(keys, [item_priority(item, method, 1.5, NOW) for item in items])
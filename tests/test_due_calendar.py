@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pytest
+
+from logic.due_calendar import DAY, DueCalendar
+
+NOW = 1_700_000_000.0
+
+
+def _random_schedule(rng, count):
+    # 过期的、一年内的和一年以后的 (粗粒度块) 都有
+    return {f"w{i}": NOW + rng.uniform(-30, 3 * 365) * DAY for i in range(count)}
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["push", "from_arrays"])
+def test_pop_until_matches_sorted_reference(bulk):
+    rng = random.Random(7)
+    reference = _random_schedule(rng, 2000)
+    if bulk:
+        calendar = DueCalendar.from_arrays(list(reference), np.array(list(reference.values())), now=NOW)
+    else:
+        calendar = DueCalendar(((ts, key) for key, ts in reference.items()), now=NOW)
+
+    now = NOW
+    while reference:
+        # 改期和删除一部分, 再把时间推进一段 (有时超过天桶环的长度)
+        for key in rng.sample(sorted(reference), min(20, len(reference))):
+            if rng.random() < 0.2:
+                assert calendar.remove(key)
+                del reference[key]
+            else:
+                reference[key] = now + rng.uniform(-1, 500) * DAY
+                calendar.push(key, reference[key])
+        now += rng.choice([0.3, 1, 7, 45, 400]) * DAY
+        expected = sorted((ts, key) for key, ts in reference.items() if ts <= now)
+        assert [ts for ts, _ in calendar.due_until(now, now=now)] == [ts for ts, _ in expected]
+        popped = calendar.pop_until(now)
+        assert sorted(popped) == expected
+        assert [ts for ts, _ in popped] == sorted(ts for ts, _ in popped)
+        for _, key in popped:
+            del reference[key]
+        assert len(calendar) == len(reference)
+        assert all(calendar.priority(key) == ts for key, ts in reference.items())
+
+
+def test_pop_until_limit_and_remove_missing():
+    calendar = DueCalendar([(NOW - 3, 'a'), (NOW - 2, 'b'), (NOW - 1, 'c')], now=NOW)
+    assert calendar.pop_until(NOW, limit=2) == [(NOW - 3, 'a'), (NOW - 2, 'b')]
+    assert not calendar.remove('a')
+    assert 'c' in calendar and len(calendar) == 1
+
+
+def test_pop_until_keeps_rejected_keys():
+    calendar = DueCalendar([(NOW - 3, 'a'), (NOW - 2, 'b'), (NOW - 1, 'c')], now=NOW)
+    assert calendar.pop_until(NOW, limit=1, accept=lambda key: key != 'a') == [(NOW - 2, 'b')]
+    assert calendar.priority('a') == NOW - 3
+    assert calendar.pop_until(NOW) == [(NOW - 3, 'a'), (NOW - 1, 'c')]
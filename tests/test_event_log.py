@@ -0,0 +1,35 @@
+from logic.core import MemorizerCore
+from logic.event_log import EventLog
+
+
+def _answer(core, count):
+    word_ids = core.data_manager.columns.word_ids
+    for i in range(count):
+        core.submit_answer(core.data_manager.get_word_by_id(word_ids[i % len(word_ids)]), i % 3 != 0, 4)
+
+
+def test_buffered_events_are_written_on_stop(data_manager, deck_dir):
+    core = MemorizerCore(str(deck_dir))
+    core.initialize()
+    _answer(core, 5)
+    # 没有 end_session, 只有退出时的最后一次保存
+    core.persistence.stop()
+    assert len(EventLog(deck_dir / "events.log")) == 5
+
+
+def test_timeseries_never_counts_unwritten_events(data_manager, deck_dir, monkeypatch):
+    core = MemorizerCore(str(deck_dir))
+    core.initialize()
+    _answer(core, 3)
+    core.data_manager.save_dirty()
+    assert core.data_manager.timeseries.events_folded == len(EventLog(deck_dir / "events.log")) == 3
+
+    # 事件日志写入失败时, 时间序列也不保存
+    monkeypatch.setattr(core.scheduler.event_log, '_flush', lambda: None)
+    _answer(core, 2)
+    core.data_manager.save_dirty()
+    reopened = MemorizerCore(str(deck_dir))
+    assert reopened.data_manager.timeseries.events_folded == len(reopened.scheduler.event_log) == 3
+    monkeypatch.undo()
+    core.persistence.stop()
+    reopened.persistence.stop()
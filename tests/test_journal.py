@@ -0,0 +1,45 @@
+import pytest
+
+from logic.core import DataManager
+from logic.journal import ReviewJournal
+
+
+def _snapshot(manager):
+    return {word: _comparable(record) for word, record in manager._snapshot_records().items()}
+
+
+def _comparable(record):
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in record.items()}
+
+
+@pytest.mark.parametrize("storage, lazy", [("json", False), ("binary", False), ("binary", True)],
+                         ids=["json", "binary", "binary-lazy"])
+def test_journal_replay_restores_incremental_saves(deck_dir, storage, lazy):
+    manager = DataManager(str(deck_dir), storage=storage)
+    manager.load_words_from_csv("deck.csv", "test")
+    manager.save_progress()
+
+    # 两轮增量保存, 同一个单词改两次; 只写复习日志, 不重写快照
+    for round_number in range(2):
+        for word in ("word1", "word2", f"word{3 + round_number}"):
+            item = manager.words[word]
+            manager.update_word_item(item.word_id, difficulty=round_number + 3, tags=[f"r{round_number}"])
+        assert manager.save_dirty()
+    assert manager.storage.journal.entries == 6
+    expected = _snapshot(manager)
+    manager.storage.close()
+
+    reloaded = DataManager(str(deck_dir), storage=storage, lazy=lazy)
+    assert reloaded.load_progress()
+    assert _snapshot(reloaded) == expected
+    assert reloaded.query_tags('r1') == {reloaded.words[word].word_id for word in ("word1", "word2", "word4")}
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+    journal = ReviewJournal(tmp_path / "progress.journal")
+    journal.append_many([{'word_id': 'a', 'interval': 6}, {'word_id': 'b', 'interval': 14}])
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"word_id": "c", "inter')
+    assert list(ReviewJournal(journal.path).replay()) == [{'word_id': 'a', 'interval': 6},
+                                                         {'word_id': 'b', 'interval': 14}]
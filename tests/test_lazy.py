@@ -0,0 +1,48 @@
+import random
+import threading
+
+from conftest import write_deck
+from logic.core import DataManager
+
+
+def test_hydration_during_background_compaction(tmp_path):
+    write_deck(tmp_path / "deck.csv", 2000)
+    manager = DataManager(str(tmp_path), storage="binary")
+    manager.load_words_from_csv("deck.csv", "test")
+    manager.save_progress()
+    manager.storage.close()
+
+    manager = DataManager(str(tmp_path), storage="binary", lazy=True, resident_limit=20)
+    assert manager.load_progress()
+    word_ids = list(manager.columns.word_ids)
+
+    def compact():
+        # 后台线程反复写完整快照, 换掉 mmap reader
+        for i in range(10):
+            with manager.lock:
+                manager.update_word_item(word_ids[i], difficulty=5)
+            manager.save_progress()
+
+    saver = threading.Thread(target=compact)
+    saver.start()
+    rng = random.Random(0)
+    errors = []
+    while saver.is_alive():
+        word_id = rng.choice(word_ids)
+        try:
+            item = manager.get_word_by_id(word_id)
+            assert item is not None and item.word_id == word_id
+        except Exception as e:
+            errors.append(e)
+    saver.join()
+    assert not errors
+    assert manager.lazy_store.resident_count <= 20 + 10
+    manager.storage.close()
+
+
+def test_json_storage_falls_back_to_eager_loading(data_manager, deck_dir):
+    manager = DataManager(str(deck_dir), storage="json", lazy=True)
+    assert not manager.lazy
+    assert manager.load_progress()
+    assert manager.lazy_store is None
+    assert len(manager.words) == 20
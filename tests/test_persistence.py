@@ -0,0 +1,34 @@
+import pytest
+
+from logic.core import MemorizerCore
+from logic.persistence import PersistenceWorker
+
+
+def test_failed_snapshot_is_retried(data_manager, monkeypatch):
+    worker = PersistenceWorker(data_manager, debounce=60)
+    saves = []
+    monkeypatch.setattr(data_manager, 'save_progress', lambda: saves.append('snapshot') or len(saves) > 1)
+    monkeypatch.setattr(data_manager, 'save_dirty', lambda: saves.append('dirty') or True)
+    worker.request_snapshot()
+    assert not worker.flush()
+    # 失败的完整快照请求保留, 下一次仍写完整快照而不是增量保存
+    assert worker.flush()
+    assert worker.flush()
+    assert saves == ['snapshot', 'snapshot', 'dirty']
+    worker.stop()
+
+
+@pytest.mark.parametrize("storage, snapshots", [("json", 1), ("sqlite", 0)])
+def test_end_session_snapshot_only_for_journaled_storage(deck_dir, storage, snapshots, monkeypatch):
+    core = MemorizerCore(str(deck_dir), storage=storage)
+    core.data_manager.load_words_from_csv("deck.csv", "test")
+    core.data_manager.save_progress()
+    core.initialize()
+    saves = []
+    monkeypatch.setattr(core.data_manager.storage, 'save_all', lambda records: saves.append(len(records)))
+    item = core.get_next_review_item()
+    core.submit_answer(item, True, 5)
+    core.end_session()
+    assert len(saves) == snapshots
+    assert core.data_manager.dirty_count == 0
+    core.persistence.stop()
@@ -0,0 +1,90 @@
+import time
+
+from logic.core import MemorizerCore
+
+
+def _session(deck_dir, **prefs):
+    core = MemorizerCore(str(deck_dir))
+    core.initialize()
+    core.update_user_preferences(**prefs)
+    return core
+
+
+def _serve_all(core, correct=True):
+    served = []
+    item = core.get_next_review_item()
+    while item is not None and len(served) < 1000:
+        served.append(item.word_id)
+        core.submit_answer(item, correct, 5 if correct else 1)
+        item = core.get_next_review_item()
+    return served
+
+
+def test_review_limit_caps_cards_per_session(data_manager, deck_dir):
+    core = _session(deck_dir, review_limit=8)
+    served = _serve_all(core)
+    assert len(served) == 8
+    assert len(set(served)) == 8
+    core.persistence.stop()
+
+
+def test_relearning_does_not_count_against_review_limit(data_manager, deck_dir):
+    core = _session(deck_dir, review_limit=5, relearn_steps=[1])
+    served = []
+    item = core.get_next_review_item()
+    while item is not None and len(served) < 100:
+        served.append(item.word_id)
+        # 每个单词第一次答错, 重学时答对
+        core.submit_answer(item, served.count(item.word_id) > 1, 4)
+        item = core.get_next_review_item()
+    assert len(set(served)) == 5
+    assert len(served) == 10
+    core.persistence.stop()
+
+
+def test_only_queue_preferences_rerank(data_manager, deck_dir, monkeypatch):
+    core = _session(deck_dir)
+    reranks = []
+    monkeypatch.setattr(core, '_rerank_queue', lambda reorder=True: reranks.append(reorder))
+    core.update_user_preferences(new_words_per_day=5, relearn_steps=[2])
+    assert not reranks
+    core.update_user_preferences(review_limit=core.user_preferences['review_limit'])
+    assert not reranks
+    core.update_user_preferences(relearn_steps=[4], shuffle_method='difficulty')
+    assert reranks == [True]
+    core.update_user_preferences(review_limit=3)
+    assert reranks == [True, False]
+    core.persistence.stop()
+
+
+def test_review_limit_change_keeps_queue_order(data_manager, deck_dir):
+    core = _session(deck_dir, review_limit=10, shuffle_method='random')
+    before = [item.word_id for item in core.scheduler.words_queue]
+    core.update_user_preferences(review_limit=15)
+    after = [item.word_id for item in core.scheduler.words_queue]
+    assert len(after) == 15
+    assert [word_id for word_id in after if word_id in before] == before
+    core.update_user_preferences(review_limit=4)
+    assert [item.word_id for item in core.scheduler.words_queue] == after[:4]
+    core.persistence.stop()
+
+
+def test_refill_keeps_skipped_words_in_calendar(data_manager, deck_dir):
+    core = _session(deck_dir, review_limit=5)
+    scheduler = core.scheduler
+    # 重学中的单词留在到期日历里, 离开重学后仍会到期
+    waiting = [word_id for _, word_id in scheduler.due_calendar.due_until(time.time())][:3]
+    for word_id in waiting:
+        scheduler.relearn_step[word_id] = 0
+    scheduler.words_queue.clear()
+    core._refill_queue()
+    assert len(scheduler.words_queue) == 5
+    assert all(word_id in scheduler.due_calendar for word_id in waiting)
+    assert not {item.word_id for item in scheduler.words_queue} & set(waiting)
+    # 不满足标签限制的单词也不会被丢掉
+    core.set_tag_filter("missing")
+    scheduler.due_calendar.push(waiting[0], 0.0)
+    core._refill_queue()
+    assert not scheduler.words_queue
+    assert waiting[0] in scheduler.due_calendar
+    core.persistence.stop()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from logic import sm2
+from logic.core import ReviewParameters, ReviewScheduler, WordItem
+
+COUNT = 3000
+
+
+@pytest.fixture(params=[1.0, 0.8, 1.7], ids=lambda modifier: f"modifier={modifier}")
+def scheduler(request):
+    return ReviewScheduler(ReviewParameters(interval_modifier=request.param))
+
+
+def test_single_step_matches_scalar(scheduler):
+    rng = np.random.default_rng(1)
+    interval = rng.choice([0, 1, 2, 6, 14, 30, 200], size=COUNT)
+    easiness = np.round(rng.uniform(1.3, 3.0, size=COUNT), 2)
+    consecutive = rng.integers(0, 6, size=COUNT)
+    quality = rng.integers(0, 6, size=COUNT)
+
+    vector = scheduler.calculate_next_reviews(interval, easiness, consecutive, quality)
+    for i in range(COUNT):
+        item = WordItem("w", "m", interval=int(interval[i]), easiness_factor=float(easiness[i]),
+                        consecutive_correct=int(consecutive[i]))
+        new_interval, new_ef = scheduler.calculate_next_review(item, int(quality[i]))
+        # 逐位一致, 不是近似相等
+        assert (new_interval, new_ef, item.consecutive_correct) == (vector[0][i], vector[1][i], vector[2][i])
+
+
+def test_replay_matches_scalar(scheduler):
+    rng = np.random.default_rng(2)
+    words = COUNT // 20
+    rows = rng.integers(0, words, size=COUNT)
+    quality = rng.integers(0, 6, size=COUNT)
+
+    interval, easiness, consecutive, event_intervals = sm2.replay(rows, quality, words, scheduler.params)
+    items = [WordItem("w", "m", easiness_factor=scheduler.params.initial_easiness) for _ in range(words)]
+    for i, (row, q) in enumerate(zip(rows.tolist(), quality.tolist())):
+        item = items[row]
+        item.interval, item.easiness_factor = scheduler.calculate_next_review(item, q)
+        assert item.interval == event_intervals[i]
+    assert [(item.interval, item.easiness_factor, item.consecutive_correct) for item in items] == \
+        list(zip(interval.tolist(), easiness.tolist(), consecutive.tolist()))
+
+
+def test_invalid_quality_rejected_by_both():
+    scheduler = ReviewScheduler()
+    with pytest.raises(ValueError):
+        scheduler.calculate_next_review(WordItem("w", "m"), 6)
+    with pytest.raises(ValueError):
+        scheduler.calculate_next_reviews(np.array([1]), np.array([2.5]), np.array([0]), np.array([-1]))
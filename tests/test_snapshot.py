@@ -0,0 +1,30 @@
+import pytest
+
+from logic.snapshot import HEADER, MAGIC, VERSION, SnapshotReader, write_snapshot
+
+
+RECORD = {
+    'word': 'apple', 'meaning': '苹果', 'pronunciation': '', 'word_id': 'id-apple',
+    'created_at': '2024-01-01T00:00:00', 'updated_at': '2024-01-02T00:00:00',
+    'difficulty': 2, 'review_count': 3, 'correct_count': 2, 'consecutive_correct': 1,
+    'last_review': '2024-01-02T00:00:00', 'next_review': '2024-01-08T00:00:00',
+    'easiness_factor': 2.36, 'interval': 6,
+    'tags': ['fruit', 'cet4'], 'examples': ['an apple a day'], 'synonyms': [], 'antonyms': [],
+}
+
+
+def test_round_trip_and_tags(tmp_path):
+    plain = dict(RECORD, word='pear', word_id='id-pear', tags=[], examples=[])
+    # CSV 中空的标签列导入为 ['']
+    empty_tag = dict(RECORD, word='plum', word_id='id-plum', tags=[''])
+    write_snapshot(tmp_path / "progress.bin", [RECORD, plain, empty_tag])
+    with SnapshotReader(tmp_path / "progress.bin") as reader:
+        assert list(reader) == [RECORD, plain, empty_tag]
+        assert list(reader.tags()) == [('id-apple', ['fruit', 'cet4']), ('id-plum', [''])]
+
+
+
+def test_rejects_other_versions(tmp_path):
+    (tmp_path / "progress.bin").write_bytes(HEADER.pack(MAGIC, VERSION + 1, 0, 0.0))
+    with pytest.raises(ValueError):
+        SnapshotReader(tmp_path / "progress.bin")
@@ -0,0 +1,26 @@
+import sqlite3
+
+from logic.core import WordItem
+from logic.storage import SqliteProgressStorage
+
+RECORD = dict(WordItem("apple", "苹果").to_dict(), word_id='id-apple', tags=['t4', 't6', 't2'])
+
+
+def test_sqlite_keeps_tag_order_and_empty_tags(tmp_path):
+    storage = SqliteProgressStorage(tmp_path / "progress.db")
+    storage.save_all({'apple': RECORD, 'pear': dict(RECORD, word_id='id-pear', word='pear', tags=[''])})
+    storage.write_records([dict(RECORD, tags=['z', 'a', 'm'])], 2)
+    assert storage.load_record('id-apple')['tags'] == ['z', 'a', 'm']
+    assert storage.load_record('id-pear')['tags'] == ['']
+    assert storage.load_tags() == {'id-apple': ['z', 'a', 'm'], 'id-pear': ['']}
+    storage.close()
+
+
+def test_sqlite_adds_position_to_old_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "progress.db"))
+    conn.executescript(SqliteProgressStorage.SCHEMA.replace("position INTEGER NOT NULL DEFAULT 0,", ""))
+    conn.close()
+    storage = SqliteProgressStorage(tmp_path / "progress.db")
+    storage.save_all({'apple': RECORD})
+    assert storage.load_record('id-apple')['tags'] == ['t4', 't6', 't2']
+    storage.close()
@@ -0,0 +1,80 @@
+import pytest
+
+from logic.core import DataManager
+from logic.tag_index import TagIndex, matches, parse_query
+
+from conftest import write_deck
+
+WORD_TAGS = {
+    'w1': ('cet4', 'verb'),
+    'w2': ('cet6', 'verb'),
+    'w3': ('cet6',),
+    'w4': ('phrasal verb',),
+    'w5': (),
+}
+
+
+@pytest.fixture
+def index():
+    index = TagIndex()
+    index.load(WORD_TAGS.items())
+    return index
+
+
+def _query(index, expression):
+    return index.query(expression, lambda: WORD_TAGS.keys())
+
+
+def test_parse_precedence():
+    assert parse_query('a OR b AND NOT c') == ('or', [('tag', 'a'), ('and', [('tag', 'b'), ('not', ('tag', 'c'))])])
+    assert parse_query('(a or b) c') == ('and', [('or', [('tag', 'a'), ('tag', 'b')]), ('tag', 'c')])
+    assert parse_query('"phrasal verb" OR "and"') == ('or', [('tag', 'phrasal verb'), ('tag', 'and')])
+
+
+@pytest.mark.parametrize('expression', ['', 'a AND', '(a', 'a )', 'NOT', '"a', 'OR a'])
+def test_parse_errors(expression):
+    with pytest.raises(ValueError):
+        parse_query(expression)
+
+
+@pytest.mark.parametrize('expression', [
+    'cet6', 'cet6 AND verb', 'cet4 OR cet6', 'NOT verb', 'verb NOT cet4', '(cet4 OR cet6) AND NOT verb',
+    '"phrasal verb"', 'missing', 'NOT missing', 'NOT (cet6 OR verb)',
+])
+def test_query_matches_per_word_evaluation(index, expression):
+    query = parse_query(expression)
+    expected = {word_id for word_id, tags in WORD_TAGS.items() if matches(query, tags)}
+    assert _query(index, expression) == expected
+
+
+def test_query_result_is_a_copy(index):
+    _query(index, 'cet6').add('w1')
+    assert _query(index, 'cet6') == {'w2', 'w3'}
+
+
+def test_update_and_remove(index):
+    index.update('w3', ('cet4',))
+    assert _query(index, 'cet6') == {'w2'}
+    assert _query(index, 'cet4') == {'w1', 'w3'}
+    index.remove('w2')
+    assert 'cet6' not in index.tags()
+
+
+def test_duplicate_tags_are_deduplicated(index):
+    index.update('w5', ('a', 'a'))
+    index.update('w5', ('c',))
+    assert _query(index, 'a') == set()
+    assert _query(index, 'c') == {'w5'}
+
+
+def test_duplicate_csv_tags_then_edit(tmp_path):
+    write_deck(tmp_path / "deck.csv", 3, tags=['a,a', 'a,b', ''])
+    manager = DataManager(str(tmp_path))
+    manager.load_words_from_csv("deck.csv", "test")
+    item = manager.words["word0"]
+    assert item.tags == ('a',)
+
+    assert manager.update_word_item(item.word_id, tags=['c'])
+    assert manager.query_tags('c') == {item.word_id}
+    assert manager.query_tags('a') == {manager.words["word1"].word_id}
+    assert manager.columns.values(item.word_id) is not None
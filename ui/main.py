@@ -10,9 +10,11 @@ from os.path import commonpath
 import tkinter as tk
 from tkinter import DISABLED, LEFT, RIGHT, Pack, ttk, messagebox, scrolledtext
 import logging
+import multiprocessing
 import sv_ttk
 import sys
 import os
+import threading
 sys.path.append(os.path.dirname(os.path.dirname(__file__))) # 工作目录定义为根目录
 
 from logic.core import MemorizerCore, WordItem
@@ -34,6 +36,7 @@ class MainApplication:
         self.core.initialize()
         
         self._create_main_interface() #调用方法, 创建主界面
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close) # 关闭窗口前先把学习进度写盘
 
     def _create_main_interface(self):
         """创建主界面"""
@@ -55,6 +58,10 @@ class MainApplication:
         self.notebook.add(self.stats_frame, text="📊 学习统计")
         self.statistics_panel = StatisticsPanel(self.stats_frame, self.core)
 
+    def _on_close(self):
+        self.core.end_session()
+        self.root.destroy()
+
     def run(self):
         self.root.mainloop() #是一个循环, 让窗口一直显示
 
@@ -214,6 +221,12 @@ class StatisticsPanel:
         self.parent_frame = parent_frame
         self.core = core
         self.canvas = None
+        self.forecast = None # 复习量预测结果, 点击 "复习量预测" 后才计算
+        self._forecast_running = False # 预测在后台线程中运行, 同时只运行一次
+        # 图表上次用到的统计结果和预测结果; 统计结果带缓存, 数据没变时是同一个对象, 不用重画
+        self._drawn_stats = None
+        self._drawn_forecast = None
+        self._stat_labels = {} # 概览统计的数值标签, 刷新时原地改文字
         self._create_widgets()
 
     def _create_widgets(self):
@@ -223,6 +236,8 @@ class StatisticsPanel:
         ttk.Label(control_frame, text="📊 学习统计", font=('Arial', 14, 'bold')).pack(side = tk.LEFT)
 
         ttk.Button(control_frame, text="刷新数据", command = self.refresh_data).pack(side = tk.RIGHT)
+        self.forecast_button = ttk.Button(control_frame, text="复习量预测", command = self._run_forecast)
+        self.forecast_button.pack(side = tk.RIGHT, padx = 5)
         
         # 数据显示区域
         self.stats_frame = ttk.LabelFrame(self.parent_frame, text="概览统计", padding="10")
@@ -231,6 +246,7 @@ class StatisticsPanel:
         # 图表显示区域
         self.chart_frame = ttk.LabelFrame(self.parent_frame, text="数据图表", padding="10")
         self.chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self._create_charts()
         
         self.refresh_data()
         
@@ -245,98 +261,186 @@ class StatisticsPanel:
             # 更新概览统计
             self._update_overview(stats, session_stats)
             
-            # 更新图表
-            self._update_charts(stats)
+            # 数据和预测都没变时不重画图表
+            if stats is not self._drawn_stats or self.forecast is not self._drawn_forecast:
+                self._update_charts(stats)
         except Exception as e:
             logger.error(f"刷新统计数据失败: {e}")
             messagebox.showerror("错误", f"刷新数据失败: {e}")
     
+    def _run_forecast(self):
+        # 蒙特卡洛模拟要几秒, 放到后台线程里, 界面不卡住
+        if self._forecast_running:
+            return
+        self._forecast_running = True
+        self.forecast_button.config(state=tk.DISABLED)
+        threading.Thread(target=self._forecast_worker, name="forecast", daemon=True).start()
+
+    def _forecast_worker(self):
+        try:
+            result, error = self.core.forecast_workload(days=14), None
+        except Exception as e:
+            result, error = None, e
+        # 控件只能在 Tk 线程中操作, 结果交回主循环处理
+        self.parent_frame.after(0, self._forecast_done, result, error)
+
+    def _forecast_done(self, result, error):
+        self._forecast_running = False
+        self.forecast_button.config(state=tk.NORMAL)
+        if error is not None:
+            logger.error(f"复习量预测失败: {error}")
+            messagebox.showerror("错误", f"复习量预测失败: {error}")
+            return
+        self.forecast = result
+        self.refresh_data()
+    
     def _update_overview(self, stats: Dict, session_stats: Dict):
-        # 清除旧的统计显示
-        for widget in self.stats_frame.winfo_children():
-            widget.destroy()
-        word_frame = ttk.LabelFrame(self.stats_frame, text = "单词统计", padding = "10")
-        word_frame.pack(side = tk.LEFT, fill = tk.BOTH, expand = True, padx = (10, 5))
-        
         word_stats = stats.get('words', {})
-        
-        self._create_stat_item(word_frame, "总数", word_stats.get('total', 0))
-        self._create_stat_item(word_frame, "已复习", word_stats.get('reviewed', 0))
-        self._create_stat_item(word_frame, "正确率", f"{word_stats.get('accuracy', 0):.1f}%")
+        values = {
+            "总数": word_stats.get('total', 0),
+            "已复习": word_stats.get('reviewed', 0),
+            "正确率": f"{word_stats.get('accuracy', 0):.1f}%"
+        }
+        # 第一次刷新时创建标签, 之后只改文字
+        if not self._stat_labels:
+            word_frame = ttk.LabelFrame(self.stats_frame, text = "单词统计", padding = "10")
+            word_frame.pack(side = tk.LEFT, fill = tk.BOTH, expand = True, padx = (10, 5))
+            for label in values:
+                self._stat_labels[label] = self._create_stat_item(word_frame, label, "")
+        for label, value in values.items():
+            self._stat_labels[label].config(text = str(value))
     
-    def _update_charts(self, stats: Dict):
-       # 清除旧图表
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
-        # 创建matplotlib图表
+    def _create_charts(self):
+        """Figure 和画布只创建一次, 刷新时修改其中的图元再重绘"""
         self.figure = Figure(figsize=(12, 6), dpi=100)
         # 创建子图
-        ax1 = self.figure.add_subplot(121)  # 左上
-        ax2 = self.figure.add_subplot(122)  # 右上
+        self.ax_words = self.figure.add_subplot(131)  # 左
+        self.ax_accuracy = self.figure.add_subplot(132)  # 中
+        self.ax_forecast = self.figure.add_subplot(133)  # 右
         # 图1: 单词统计柱状图
-        self._create_word_stats_chart(ax1, stats)
+        self._create_word_stats_chart(self.ax_words)
         
         # 图2: 单词正确率饼图
-        self._create_word_accuracy_chart(ax2, stats)
+        self._create_word_accuracy_chart(self.ax_accuracy)
         
+        # 图3: 未来每天的预计复习量
+        self._create_forecast_chart(self.ax_forecast)
         
         self.figure.tight_layout()
         # 嵌入到Tkinter
         self.canvas = FigureCanvasTkAgg(self.figure, self.chart_frame)
-        self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    def _create_word_stats_chart(self, ax, stats:Dict):
-        words = stats.get('words', {})
+    
+    def _update_charts(self, stats: Dict):
+        self._update_word_stats_chart(self.ax_words, stats)
+        self._update_word_accuracy_chart(self.ax_accuracy, stats)
+        if self.forecast is not self._drawn_forecast:
+            # 预测只在点击 "复习量预测" 后变化, 天数也可能不同, 整个子图重画
+            self.ax_forecast.clear()
+            self._create_forecast_chart(self.ax_forecast)
+        self._drawn_stats, self._drawn_forecast = stats, self.forecast
+        self.canvas.draw_idle()
+
+    def _create_word_stats_chart(self, ax):
         categories = ['Total', 'Reviewed']
-        word_values = [words.get('total', 0), words.get('reviewed', 0)]
-
         x = np.arange(len(categories))
 
-        ax.bar(x, word_values, color='skyblue', alpha=0.8)
+        self.word_bars = ax.bar(x, [0] * len(categories), color='skyblue', alpha=0.8)
 
         ax.set_title('Word Learning Statistics')
         ax.set_xticks(x)
         ax.set_xticklabels(categories)
         ax.grid(True, alpha=0.3)
 
-        # 在柱状图上显示数值
-        for i, v in enumerate(word_values):
-            ax.text(i, v + max(word_values) * 0.01, str(v), ha='center', va='bottom')
+        # 柱状图上的数值
+        self.word_bar_labels = [ax.text(i, 0, '', ha='center', va='bottom') for i in x]
+
+    def _update_word_stats_chart(self, ax, stats: Dict):
+        words = stats.get('words', {})
+        word_values = [words.get('total', 0), words.get('reviewed', 0)]
+        top = max(word_values)
+
+        for bar, label, v in zip(self.word_bars, self.word_bar_labels, word_values):
+            bar.set_height(v)
+            label.set_y(v + top * 0.01)
+            label.set_text(str(v))
+        ax.set_ylim(0, top * 1.1 or 1)
     
-    def _create_word_accuracy_chart(self, ax, stats: Dict):
+    def _create_word_accuracy_chart(self, ax):
+        # 先画两个等分的扇形, 刷新时只改角度和文字
+        self.accuracy_wedges, self.accuracy_labels, self.accuracy_texts = ax.pie(
+            [1, 1], labels=['correct', 'incorrect'], colors=['lightgreen', 'lightcoral'],
+            autopct='%1.1f%%', startangle=90)
+        self.accuracy_empty = ax.text(0.5, 0.5, 'no_records', ha='center', va='center',
+                                      transform=ax.transAxes, fontsize=12)
+        ax.set_title('word_accuracy')
+
+    def _update_word_accuracy_chart(self, ax, stats: Dict):
         words = stats.get('words', {})
 
         word_accuracy = words.get('accuracy', 0)
         word_reviewed = words.get('reviewed', 0)
-        word_total = words.get('total', 0)
 
-        if word_reviewed > 0:
-            correct_count = round(word_reviewed * word_accuracy / 100)
-            incorrect_count = word_reviewed - correct_count
-            
-            labels = ['correct','incorrect']
-            sizes = [correct_count, incorrect_count]
-            colors = ['lightgreen', 'lightcoral']
-            ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-            ax.set_title(f"word_accuracy ({word_accuracy:.1f}%)")
-
-        else:
-            ax.text(0.5, 0.5,'no_records', ha='center', va='center', 
-                   transform=ax.transAxes, fontsize=12)
+        has_records = word_reviewed > 0
+        for artist in (*self.accuracy_wedges, *self.accuracy_labels, *self.accuracy_texts):
+            artist.set_visible(has_records)
+        self.accuracy_empty.set_visible(not has_records)
+        if not has_records:
             ax.set_title('word_accuracy')
+            return
+
+        correct_count = round(word_reviewed * word_accuracy / 100)
+        incorrect_count = word_reviewed - correct_count
+        # 与 ax.pie(startangle=90) 的布局相同: 从 90 度起逆时针排列, 文字在扇形的中线上
+        theta = 90.0
+        for wedge, label, text, size in zip(self.accuracy_wedges, self.accuracy_labels, self.accuracy_texts,
+                                            [correct_count, incorrect_count]):
+            sweep = 360.0 * size / word_reviewed
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + sweep)
+            middle = np.deg2rad(theta + sweep / 2)
+            x, y = np.cos(middle), np.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            text.set_position((0.6 * x, 0.6 * y))
+            text.set_text(f"{sweep / 3.6:.1f}%")
+            label.set_visible(size > 0)
+            text.set_visible(size > 0)
+            theta += sweep
+        ax.set_title(f"word_accuracy ({word_accuracy:.1f}%)")
     
 
+    def _create_forecast_chart(self, ax):
+        if not self.forecast:
+            ax.text(0.5, 0.5, 'no_forecast', ha='center', va='center',
+                   transform=ax.transAxes, fontsize=12)
+            ax.set_title('review_forecast')
+            return
+        expected = np.array(self.forecast['expected'])
+        # 误差线为 10%~90% 分位; 分布偏斜时均值可能落在分位之外, 误差线长度不能为负
+        errors = [np.maximum(expected - np.array(self.forecast['p10']), 0),
+                  np.maximum(np.array(self.forecast['p90']) - expected, 0)]
+        x = np.arange(len(expected))
+        ax.bar(x, expected, yerr=errors, color='orange', alpha=0.8, capsize=2)
+        ax.set_xticks(x)
+        ax.set_xticklabels([date[5:] for date in self.forecast['dates']], rotation=45, fontsize=7)
+        ax.set_title(f"review_forecast ({sum(self.forecast['minutes']):.0f} min)")
+        ax.grid(True, alpha=0.3)
+    
     def _create_stat_item(self, parent, label: str, value):
         item_frame = ttk.Frame(parent)
         item_frame.pack(fill = tk.X, pady = 2)
 
         ttk.Label(item_frame, text = f"{label}:", font = ('Arial', 9)).pack(side=tk.LEFT)
-        ttk.Label(item_frame, text = str(value), font = ('Arial', 9, 'bold')).pack(side = tk.RIGHT)
+        value_label = ttk.Label(item_frame, text = str(value), font = ('Arial', 9, 'bold'))
+        value_label.pack(side = tk.RIGHT)
+        return value_label
     
 
 #程序入口
 if __name__ == "__main__":
+    # 复习量预测使用进程池, 打包成 Windows 可执行文件后子进程需要这一步
+    multiprocessing.freeze_support()
     try:
         app = MainApplication()
         app.run()